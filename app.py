@@ -1,10 +1,20 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, g, request, jsonify, render_template_string
 from flask_cors import CORS
-from mcq_generator import generate_mcqs, is_spacy_available
+from mcq_generator import (ENTITY_TYPES, DocumentAnalysis, analyze_text, analyze_texts, analyze_pages, sample_questions,
+                           stream_pages, generator, is_spacy_available)
+from corpus_index import CorpusIndex
+from result_cache import MemoryBackend, ResultCache, create_cache_from_env, is_cache_key, make_cache_key
+from jobs import JobQueue
+from pdf_extraction import ExtractionResult, extract_pdf_text, iter_pdf_pages, open_pdf, page_order
+from uploads import SpoolingRequest
+from metrics import (CACHE_LOOKUPS, PAGES_EXTRACTED, REGISTRY, REQUEST_SECONDS, REQUESTS, collect_timings,
+                     record_stage, timed)
 import logging
 import os
+import random
+import tempfile
+import time
 from werkzeug.exceptions import BadRequest
-import PyPDF2
 from datetime import datetime
 import uuid
 import json
@@ -14,11 +24,78 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# Uploaded files are streamed to hashed temp files instead of being held in memory
+app.request_class = SpoolingRequest
 CORS(app)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here')
 
 # Configuration - 500MB max file size
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max file size
+# Ceiling for non-file form fields, the only part of a request kept in memory
+app.config['MAX_FORM_MEMORY_SIZE'] = int(os.environ.get('MCQ_MAX_FORM_MEMORY', 1024 * 1024))
+
+# Extracted text and analysis per uploaded PDF, keyed by content hash and settings
+result_cache = create_cache_from_env()
+
+# Assembled exams per analysis, num_questions and seed; cheap to rebuild, so kept in memory
+exam_cache = ResultCache(MemoryBackend(int(os.environ.get('MCQ_EXAM_CACHE_ENTRIES', 256))))
+
+# Most texts accepted by one /generate_questions request
+MAX_BATCH_ITEMS = int(os.environ.get('MCQ_MAX_BATCH_ITEMS', 1000))
+
+# Background PDF processing; job state lives in SQLite so any worker can answer polls
+job_queue = JobQueue(
+    os.environ.get('MCQ_JOBS_DB', os.path.join(tempfile.gettempdir(), 'mcq_jobs.sqlite3')),
+    max_workers=int(os.environ.get('MCQ_JOB_WORKERS', 2)),
+    stale_seconds=int(os.environ.get('MCQ_JOB_STALE_SECONDS', 120))
+)
+
+# Entities of the documents analyzed for each course, shared as distractors across the course
+corpus_index = CorpusIndex(os.environ.get('MCQ_CORPUS_DB', os.path.join(tempfile.gettempdir(), 'mcq_corpus.sqlite3')))
+
+# Longest accepted course name
+MAX_COURSE_LENGTH = 200
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed bodies are still being produced here; their stages are counted in mcq_stage_seconds
+    endpoint = request.endpoint or 'unknown'
+    if 'request_start' in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    return response
+
+def is_enabled(value):
+    """Whether a form or JSON flag is switched on"""
+    if isinstance(value, bool):
+        return value
+    return str(value or '').lower() in ('1', 'true', 'on', 'yes')
+
+def parse_seed(value):
+    """The integer seed a request asked for, or a new random one when it gave none; raises ValueError"""
+    if value is None or value == '':
+        return random.randrange(2 ** 32)
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError('seed must be an integer')
+
+def parse_course(value):
+    """The course a request's document belongs to, or None; raises ValueError"""
+    if value is None:
+        return None
+    if not isinstance(value, str) or len(value.strip()) > MAX_COURSE_LENGTH:
+        raise ValueError(f"course must be a string of at most {MAX_COURSE_LENGTH} characters")
+    return value.strip() or None
+
+def timing_breakdown(timings):
+    """Seconds spent per pipeline stage, for responses to requests that asked for timings"""
+    return {stage: round(seconds, 6) for stage, seconds in timings.items()}
 
 @app.errorhandler(413)
 def too_large(e):
@@ -145,6 +222,10 @@ def home():
                 color: #2d3748;
                 font-weight: 600;
             }
+            .form-group .checkbox-label {
+                font-weight: normal;
+                cursor: pointer;
+            }
             .form-group input[type="number"] {
                 width: 120px;
                 padding: 10px;
@@ -481,6 +562,19 @@ def home():
                         <input type="number" id="numQuestions" name="num_questions" value="5" min="1" max="20">
                     </div>
                     
+                    <div class="form-group">
+                        <label for="pageStart">Pages (optional):</label>
+                        <input type="number" id="pageStart" name="page_start" min="1" placeholder="From">
+                        <input type="number" id="pageEnd" name="page_end" min="1" placeholder="To">
+                    </div>
+                    
+                    <div class="form-group">
+                        <label class="checkbox-label">
+                            <input type="checkbox" id="quickMode" checked>
+                            Quick mode: stop reading once enough questions are found
+                        </label>
+                    </div>
+                    
                     <button type="submit" class="btn btn-primary" id="generateBtn">
                         Generate MCQ Questions & Start Exam
                     </button>
@@ -488,7 +582,7 @@ def home():
                 
                 <div class="loading" id="loading">
                     <div class="loading-spinner"></div>
-                    <p>Processing PDF and generating MCQ questions...</p>
+                    <p id="loadingText">Processing PDF and generating MCQ questions...</p>
                 </div>
                 
                 <div class="error" id="error"></div>
@@ -558,15 +652,20 @@ def home():
                 </div>
                 
                 <div class="submit-section">
-                    <button class="btn btn-primary" onclick="resetExam()">
+                    <button class="btn btn-primary" id="newQuestionsBtn" onclick="generateNewQuestions()">
                         Generate New Questions
                     </button>
+                    <button class="btn btn-secondary" onclick="resetExam()">
+                        Upload Another PDF
+                    </button>
                 </div>
             </div>
         </div>
 
         <script>
             let currentQuestions = [];
+            let currentAnalysisId = null;
+            let currentNumQuestions = 5;
             let userAnswers = {};
             let examStartTime = null;
             let examTimer = null;
@@ -580,6 +679,7 @@ def home():
             const uploadForm = document.getElementById('uploadForm');
             const generateBtn = document.getElementById('generateBtn');
             const loading = document.getElementById('loading');
+            const loadingText = document.getElementById('loadingText');
             const error = document.getElementById('error');
 
             fileInput.addEventListener('change', function(e) {
@@ -631,32 +731,106 @@ def home():
                 
                 formData.append('file', file);
                 formData.append('num_questions', numQuestions);
+                formData.append('page_start', document.getElementById('pageStart').value);
+                formData.append('page_end', document.getElementById('pageEnd').value);
+                formData.append('incremental', document.getElementById('quickMode').checked ? 'true' : 'false');
+                formData.append('stream', 'true');
                 
                 generateBtn.disabled = true;
                 loading.style.display = 'block';
                 error.style.display = 'none';
                 
+                currentQuestions = [];
+                currentAnalysisId = null;
+                currentNumQuestions = numQuestions;
+                
                 try {
-                    const response = await fetch('/generate_questions_from_pdf', {
+                    const response = await fetch('/jobs', {
                         method: 'POST',
                         body: formData
                     });
                     
-                    const result = await response.json();
+                    const submitted = await response.json();
+                    const result = submitted.success ? await pollJob(submitted.job_id) : submitted;
                     
                     if (result.success) {
-                        currentQuestions = result.questions;
-                        startExam();
+                        currentAnalysisId = result.analysis_id;
+                        addQuestions(result.questions);
+                        finishQuestions();
+                    } else if (currentQuestions.length) {
+                        finishQuestions();
                     } else {
                         showError(result.message || 'Failed to generate questions');
                     }
                 } catch (err) {
-                    showError('Network error: ' + err.message);
+                    if (currentQuestions.length) {
+                        finishQuestions();
+                    } else {
+                        showError('Network error: ' + err.message);
+                    }
                 } finally {
                     generateBtn.disabled = false;
                     loading.style.display = 'none';
+                    loadingText.textContent = 'Processing PDF and generating MCQ questions...';
                 }
             });
+            
+            // Poll a job until it finishes, showing its progress and each question it publishes
+            async function pollJob(jobId) {
+                while (true) {
+                    await new Promise(resolve => setTimeout(resolve, 1000));
+                    const response = await fetch(`/jobs/${jobId}`);
+                    const job = await response.json();
+                    if (!job.success) {
+                        return job;
+                    }
+                    if (job.status === 'completed' || job.status === 'failed') {
+                        return job.result;
+                    }
+                    
+                    showProgress(job.progress);
+                    addQuestions(job.progress.questions || []);
+                }
+            }
+            
+            // Add the questions of a list that are not shown yet
+            function addQuestions(questions) {
+                questions.slice(currentQuestions.length).forEach(addQuestion);
+            }
+            
+            // Show the exam with the first question and append the rest as they come in
+            function addQuestion(question) {
+                currentQuestions.push(question);
+                if (currentQuestions.length === 1) {
+                    startExam();
+                    document.getElementById('submitExamBtn').disabled = true;
+                    document.getElementById('questionCount').textContent = 'Generating questions...';
+                } else {
+                    appendQuestion(question, currentQuestions.length - 1);
+                    updateQuestionTotals();
+                    updateProgress();
+                }
+            }
+            
+            function finishQuestions() {
+                document.getElementById('submitExamBtn').disabled = false;
+                document.getElementById('questionCount').textContent = `${currentQuestions.length} Questions`;
+                updateQuestionTotals();
+            }
+            
+            function showProgress(progress) {
+                if (progress.stage === 'extracting') {
+                    loadingText.textContent = `Extracting text: page ${progress.pages_extracted} of ${progress.total_pages}`;
+                } else if (progress.stage === 'parsing' && progress.pages_analyzed !== undefined) {
+                    loadingText.textContent = progress.total_pages
+                        ? `Analyzing text: ${progress.pages_analyzed} of ${progress.total_pages} pages read`
+                        : `Analyzing text: ${progress.pages_analyzed} pages read`;
+                } else if (progress.stage === 'parsing') {
+                    loadingText.textContent = `Analyzing text: part ${progress.chunks_parsed} of ${progress.total_chunks}`;
+                } else if (progress.stage === 'generating') {
+                    loadingText.textContent = 'Generating MCQ questions...';
+                }
+            }
 
             function startExam() {
                 document.getElementById('uploadSection').style.display = 'none';
@@ -677,42 +851,51 @@ def home():
                 const container = document.getElementById('questionsContainer');
                 container.innerHTML = '';
                 
-                currentQuestions.forEach((question, index) => {
-                    const questionDiv = document.createElement('div');
-                    questionDiv.className = 'question-container';
-                    
-                    const optionsList = question.options.map((option, i) => {
-                        const optionId = `q${index}_option${i}`;
-                        return `
-                            <li class="option-item">
-                                <label class="option-label" for="${optionId}">
-                                    <input type="radio" 
-                                           class="option-radio" 
-                                           id="${optionId}"
-                                           name="question_${index}" 
-                                           value="${option}" 
-                                           onchange="updateAnswer(${index}, '${option}', this)">
-                                    <span class="option-text">${String.fromCharCode(65 + i)}. ${option}</span>
-                                </label>
-                            </li>
-                        `;
-                    }).join('');
-                    
-                    questionDiv.innerHTML = `
-                        <div class="question-number">
-                            Question ${index + 1} of ${currentQuestions.length}
-                            <span class="question-type-badge">MCQ</span>
-                        </div>
-                        <div class="question-text">${question.question}</div>
-                        <ul class="options-container">${optionsList}</ul>
-                    `;
-                    
-                    container.appendChild(questionDiv);
-                });
+                currentQuestions.forEach((question, index) => appendQuestion(question, index));
                 
                 updateProgress();
             }
             
+            function appendQuestion(question, index) {
+                const container = document.getElementById('questionsContainer');
+                const questionDiv = document.createElement('div');
+                questionDiv.className = 'question-container';
+                
+                const optionsList = question.options.map((option, i) => {
+                    const optionId = `q${index}_option${i}`;
+                    return `
+                        <li class="option-item">
+                            <label class="option-label" for="${optionId}">
+                                <input type="radio" 
+                                       class="option-radio" 
+                                       id="${optionId}"
+                                       name="question_${index}" 
+                                       value="${option}" 
+                                       onchange="updateAnswer(${index}, '${option}', this)">
+                                <span class="option-text">${String.fromCharCode(65 + i)}. ${option}</span>
+                            </label>
+                        </li>
+                    `;
+                }).join('');
+                
+                questionDiv.innerHTML = `
+                    <div class="question-number">
+                        Question ${index + 1} of <span class="question-total">${currentQuestions.length}</span>
+                        <span class="question-type-badge">MCQ</span>
+                    </div>
+                    <div class="question-text">${question.question}</div>
+                    <ul class="options-container">${optionsList}</ul>
+                `;
+                
+                container.appendChild(questionDiv);
+            }
+            
+            function updateQuestionTotals() {
+                document.querySelectorAll('.question-total').forEach(total => {
+                    total.textContent = currentQuestions.length;
+                });
+            }
+            
             function updateAnswer(questionIndex, answer, radioElement) {
                 userAnswers[questionIndex] = answer;
                 
@@ -836,13 +1019,52 @@ def home():
                 });
             }
                 
+            async function generateNewQuestions() {
+                // Without a stored analysis the PDF has to be uploaded again
+                if (!currentAnalysisId) {
+                    resetExam();
+                    return;
+                }
+                
+                const newQuestionsBtn = document.getElementById('newQuestionsBtn');
+                newQuestionsBtn.disabled = true;
+                
+                try {
+                    const response = await fetch('/generate_questions_from_analysis', {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({
+                            analysis_id: currentAnalysisId,
+                            num_questions: currentNumQuestions
+                        })
+                    });
+                    
+                    const result = await response.json();
+                    
+                    if (result.success) {
+                        currentQuestions = result.questions;
+                        startExam();
+                    } else {
+                        resetExam();
+                        showError(result.message || 'Failed to generate questions');
+                    }
+                } catch (err) {
+                    resetExam();
+                    showError('Network error: ' + err.message);
+                } finally {
+                    newQuestionsBtn.disabled = false;
+                }
+            }
+            
             function resetExam() {
                 document.getElementById('uploadSection').style.display = 'block';
                 document.getElementById('examSection').style.display = 'none';
                 document.getElementById('resultsSection').style.display = 'none';
                 
                 currentQuestions = [];
+                currentAnalysisId = null;
                 userAnswers = {};
+                document.getElementById('submitExamBtn').disabled = false;
                 
                 if (examTimer) {
                     clearInterval(examTimer);
@@ -865,130 +1087,790 @@ def home():
     '''
     return render_template_string(html_template)
 
-@app.route('/generate_questions_from_pdf', methods=['POST'])
-def generate_questions_from_pdf():
-    """Generate MCQs from PDF file"""
+def validate_pdf_request():
+    """Check the uploaded PDF and form parameters, returning (file, options, error response)"""
+    # Check if spaCy is available
+    if not is_spacy_available():
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'NLP model not available',
+            'message': 'spaCy English model is not loaded. Please install it with: python -m spacy download en_core_web_sm'
+        }), 503)
+    
+    # Check if file is present
+    if 'file' not in request.files:
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'No file provided',
+            'message': 'Please upload a PDF file'
+        }), 400)
+    
+    file = request.files['file']
+    if file.filename == '':
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'No file selected',
+            'message': 'Please select a PDF file to upload'
+        }), 400)
+    
+    # Validate file type
+    if not file.filename.lower().endswith('.pdf'):
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'Invalid file type',
+            'message': 'Only PDF files are supported'
+        }), 400)
+    
+    # Get parameters
+    num_questions = request.form.get('num_questions', 5)
+    
     try:
-        # Check if spaCy is available
-        if not is_spacy_available():
-            return jsonify({
-                'success': False,
-                'error': 'NLP model not available',
-                'message': 'spaCy English model is not loaded. Please install it with: python -m spacy download en_core_web_sm'
-            }), 503
-        
-        # Check if file is present
-        if 'file' not in request.files:
-            return jsonify({
-                'success': False,
-                'error': 'No file provided',
-                'message': 'Please upload a PDF file'
-            }), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({
-                'success': False,
-                'error': 'No file selected',
-                'message': 'Please select a PDF file to upload'
-            }), 400
-        
-        # Validate file type
-        if not file.filename.lower().endswith('.pdf'):
-            return jsonify({
-                'success': False,
-                'error': 'Invalid file type',
-                'message': 'Only PDF files are supported'
-            }), 400
-        
-        # Get parameters
-        num_questions = request.form.get('num_questions', 5)
-        
-        try:
-            num_questions = int(num_questions)
-            if num_questions < 1 or num_questions > 20:
-                raise ValueError()
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'error': 'Invalid number of questions',
-                'message': 'num_questions must be an integer between 1 and 20'
-            }), 400
+        num_questions = int(num_questions)
+        if num_questions < 1 or num_questions > 20:
+            raise ValueError()
+    except ValueError:
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'Invalid number of questions',
+            'message': 'num_questions must be an integer between 1 and 20'
+        }), 400)
+    
+    # Optional 1-based, inclusive page range
+    try:
+        page_start = int(request.form['page_start']) if request.form.get('page_start') else None
+        page_end = int(request.form['page_end']) if request.form.get('page_end') else None
+        if (page_start is not None and page_start < 1) or (page_end is not None and page_end < 1):
+            raise ValueError()
+        if page_start and page_end and page_start > page_end:
+            raise ValueError()
+    except ValueError:
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'Invalid page range',
+            'message': 'page_start and page_end must be positive integers with page_start <= page_end'
+        }), 400)
+    
+    page_sampling = request.form.get('page_sampling', 'spread')
+    if page_sampling not in ('sequential', 'spread'):
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'Invalid page sampling',
+            'message': "page_sampling must be 'sequential' or 'spread'"
+        }), 400)
+    
+    try:
+        seed = parse_seed(request.form.get('seed'))
+    except ValueError as e:
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'Invalid seed',
+            'message': str(e)
+        }), 400)
+    
+    try:
+        course = parse_course(request.form.get('course'))
+    except ValueError as e:
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'Invalid course',
+            'message': str(e)
+        }), 400)
+    
+    options = {
+        'num_questions': num_questions,
+        'page_start': page_start,
+        'page_end': page_end,
+        # Stop reading pages once enough candidate questions were found
+        'incremental': is_enabled(request.form.get('incremental')),
+        'page_sampling': page_sampling,
+        # The same document, settings and seed always give the same exam
+        'seed': seed,
+        # Add a per-stage timing breakdown to the response
+        'timings': is_enabled(request.form.get('timings')),
+        # Share entities as distractors with the other documents of this course
+        'course': course
+    }
+    return file, options, None
+
+def pdf_cache_key(content_hash, options, streamed=False):
+    """Cache key of a PDF's extracted text and analysis under the current settings and page options"""
+    page_settings = {
+        'page_start': options['page_start'],
+        'page_end': options['page_end'],
+        'incremental': options['incremental']
+    }
+    if options['incremental']:
+        # How far an incremental analysis reads depends on these too
+        page_settings.update(page_sampling=options['page_sampling'], num_questions=options['num_questions'])
+    elif streamed:
+        # A streamed analysis is merged from page batches read in page_sampling order
+        page_settings.update(streamed=True, page_sampling=options['page_sampling'])
+    return make_cache_key(content_hash, {**generator.settings(), 'pages': page_settings})
+
+def exam_cache_key(analysis_id, num_questions, seed, course=None, document_id=None):
+    """Cache key of the exam drawn from an analysis with the given size and seed
+
+    With a course, the key also counts the course's documents other than
+    document_id (the PDF's content hash; analysis_id by default).
+    """
+    settings = {
+        'num_questions': num_questions,
+        'seed': seed,
+        'distractor_ranking': generator.distractor_ranking
+    }
+    if course:
+        # Course distractors change as other documents join the course
+        with timed('corpus_index'):
+            other_documents = corpus_index.other_documents(course, document_id or analysis_id)
+        settings.update(course=course, course_documents=other_documents)
+    return make_cache_key(analysis_id, settings)
+
+def index_document(course, document_id, entities):
+    """Add an analyzed document's entities to its course, if it has one"""
+    if course:
+        with timed('corpus_index'):
+            corpus_index.add_document(course, document_id, entities)
+
+def course_entities(course):
+    """Entities of the course's documents by type, or None without a course"""
+    if not course:
+        return None
+    with timed('corpus_index'):
+        return corpus_index.entities(course, ENTITY_TYPES)
+
+def cached_exam(exam_key, stored_exams=None):
+    """Questions of a previously assembled exam, or None
+
+    stored_exams are the exams kept with an analysis in the result cache
+    (exam key -> questions), looked up when this worker's exam cache misses.
+    """
+    exam = exam_cache.get(exam_key)
+    if exam is None and stored_exams and exam_key in stored_exams:
+        exam = {'questions': stored_exams[exam_key]}
+        exam_cache.set(exam_key, exam)
+    CACHE_LOOKUPS.inc(cache='exam', result='hit' if exam else 'miss')
+    return exam['questions'] if exam else None
+
+def exam_questions(analysis_id, load_analysis, num_questions, seed, course=None, document_id=None,
+                   stored_exams=None):
+    """The MCQs of one exam, the same for the same analysis, num_questions, seed and course documents
+
+    Repeated exams come from the exam cache or stored_exams; load_analysis
+    returns the DocumentAnalysis (or None) and is only called on a miss.
+    """
+    exam_key = exam_cache_key(analysis_id, num_questions, seed, course, document_id)
+    mcqs = cached_exam(exam_key, stored_exams)
+    if mcqs is not None:
+        return mcqs
+    
+    analysis = load_analysis()
+    mcqs = sample_questions(analysis, num_questions, seed, course_entities(course)) if analysis else []
+    for mcq in mcqs:
+        mcq['type'] = 'mcq'
+    # Shuffle questions for variety, seeded so the exam stays reproducible
+    random.Random(seed).shuffle(mcqs)
+    
+    if mcqs:
+        exam_cache.set(exam_key, {'questions': mcqs})
+    return mcqs
+
+def process_pdf(pdf_path, content_hash, filename, options, progress=None):
+    """Extract, analyze and build MCQs for an uploaded PDF, returning (payload, HTTP status)"""
+    with collect_timings() as timings:
+        payload, status = build_pdf_questions(pdf_path, content_hash, filename, options, progress)
+    if options.get('timings'):
+        payload['timings'] = timing_breakdown(timings)
+    return payload, status
+
+def build_pdf_questions(pdf_path, content_hash, filename, options, progress=None):
+    """The work of process_pdf, whose stage timings it collects"""
+    progress = progress or (lambda **fields: None)
+    num_questions = options['num_questions']
+    logger.info(f"Processing PDF file: {filename}")
+    
+    start_time = datetime.now()
+    cache_key = pdf_cache_key(content_hash, options)
+    cached = result_cache.get(cache_key)
+    CACHE_LOOKUPS.inc(cache='analysis', result='hit' if cached else 'miss')
+    
+    if cached:
+        text = cached['text']
+        pages_processed = cached['pages_processed']
+        analysis = None
+        logger.info(f"Cache hit for {filename}, skipping extraction and analysis")
+    else:
+        def report_extraction(pages_extracted, total_pages):
+            progress(stage='extracting', pages_extracted=pages_extracted, total_pages=total_pages)
         
-        logger.info(f"Processing PDF file: {file.filename}")
+        analysis = None
         
         # Extract text from PDF
         try:
-            pdf_reader = PyPDF2.PdfReader(file.stream)
-            text = ""
-            pages_processed = 0
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text and page_text.strip():
-                        text += page_text + "\n"
-                        pages_processed += 1
-                except Exception as e:
-                    logger.warning(f"Could not extract text from page {page_num + 1}: {str(e)}")
-                    continue
+            if options['incremental']:
+                extracted_pages = []
+                
+                def page_texts():
+                    for page in iter_pdf_pages(pdf_path, options['page_start'], options['page_end'],
+                                               spread=options['page_sampling'] == 'spread',
+                                               progress=report_extraction):
+                        extracted_pages.append(page)
+                        if page.text.strip():
+                            yield page.text
+                
+                # Pages are only extracted as the analysis asks for them
+                analysis = analyze_pages(
+                    page_texts(), num_questions,
+                    progress=lambda pages_analyzed: progress(stage='parsing', pages_analyzed=pages_analyzed)
+                )
+                extraction = ExtractionResult(pages=sorted(extracted_pages, key=lambda page: page.number))
+                # Interleaved with the analysis, so add up the per-page extraction times
+                record_stage('pdf_extraction', sum(page.seconds for page in extraction.pages))
+            else:
+                with timed('pdf_extraction'):
+                    extraction = extract_pdf_text(pdf_path, progress=report_extraction,
+                                                  page_start=options['page_start'], page_end=options['page_end'])
+            PAGES_EXTRACTED.inc(len(extraction.pages))
+            text = extraction.text
+            pages_processed = extraction.pages_processed
             
             if not text.strip():
-                return jsonify({
+                return {
                     'success': False,
                     'error': 'No text extracted',
                     'message': 'Could not extract readable text from the PDF file'
-                }), 422
+                }, 422
             
-            logger.info(f"Extracted text from {pages_processed} pages, total length: {len(text)}")
+            slowest = max(extraction.pages, key=lambda page: page.seconds)
+            logger.info(f"Extracted text from {pages_processed} pages, total length: {len(text)}, "
+                        f"slowest page {slowest.number} ({slowest.seconds:.2f}s), "
+                        f"{len(extraction.failed_pages)} failed")
             
         except Exception as e:
             logger.error(f"Error reading PDF: {str(e)}")
-            return jsonify({
+            return {
                 'success': False,
                 'error': 'PDF processing error',
                 'message': 'Could not read the PDF file. Please ensure it is not corrupted.'
-            }), 422
+            }, 422
         
-        # Generate MCQs
-        start_time = datetime.now()
-        mcqs = generate_mcqs(text, num_questions)
+        if not options['incremental']:
+            analysis = analyze_text(
+                text,
+                progress=lambda chunks_parsed, total_chunks: progress(
+                    stage='parsing', chunks_parsed=chunks_parsed, total_chunks=total_chunks)
+            )
+        if analysis:
+            result_cache.set(cache_key, {
+                'text': text,
+                'content_hash': content_hash,
+                'pages_processed': pages_processed,
+                'analysis': analysis.to_dict()
+            })
+    
+    if analysis or cached:
+        index_document(options['course'], content_hash,
+                       cached['analysis']['entities'] if cached else analysis.entities)
+    
+    # Generate MCQs
+    progress(stage='generating')
+    load_analysis = (lambda: DocumentAnalysis.from_dict(cached['analysis'])) if cached else (lambda: analysis)
+    mcqs = exam_questions(cache_key, load_analysis, num_questions, options['seed'], options['course'], content_hash)
+    
+    end_time = datetime.now()
+    processing_time = (end_time - start_time).total_seconds()
+    
+    if not mcqs:
+        return {
+            'success': False,
+            'error': 'No questions generated',
+            'message': 'Could not generate MCQ questions from the PDF content. The document may not contain enough suitable information.'
+        }, 422
+    
+    logger.info(f"Successfully generated {len(mcqs)} MCQ questions from PDF in {processing_time:.2f}s")
+    
+    return {
+        'success': True,
+        'questions': mcqs,
+        'processing_time': processing_time,
+        'pages_processed': pages_processed,
+        'text_length': len(text),
+        'cached': cached is not None,
+        'analysis_id': cache_key,
+        'seed': options['seed']
+    }, 200
+
+@app.route('/generate_questions_from_pdf', methods=['POST'])
+def generate_questions_from_pdf():
+    """Generate MCQs from PDF file"""
+    try:
+        file, options, error_response = validate_pdf_request()
+        if error_response:
+            return error_response
         
-        # Add type field to each question
-        for mcq in mcqs:
-            mcq['type'] = 'mcq'
+        # The upload was spooled to disk and hashed while the request was parsed
+        upload = file.stream
+        upload.flush()
+        payload, status = process_pdf(upload.path, upload.sha256, file.filename, options)
+        return jsonify(payload), status
         
-        end_time = datetime.now()
-        processing_time = (end_time - start_time).total_seconds()
+    except Exception as e:
+        logger.error(f"Unexpected error in generate_questions_from_pdf: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Processing error',
+            'message': 'An unexpected error occurred while processing your request'
+        }), 500
+
+def stream_pdf_events(pdf_path, content_hash, filename, options):
+    """Yield progress events, each MCQ as soon as it is built, then a final done or error event
+
+    Pages are extracted and analyzed in small batches and questions are built
+    from the pages read so far, so the first question arrives after the first
+    batch rather than after the whole document. Owns and removes the spooled upload.
+    """
+    with collect_timings() as timings:
+        for event in build_pdf_events(pdf_path, content_hash, filename, options):
+            if event['event'] == 'done' and options.get('timings'):
+                event['timings'] = timing_breakdown(timings)
+            yield event
+
+def build_pdf_events(pdf_path, content_hash, filename, options):
+    """The events of stream_pdf_events, whose stage timings it collects"""
+    num_questions = options['num_questions']
+    logger.info(f"Streaming questions for PDF file: {filename}")
+    start_time = datetime.now()
+    time_to_first_question = None
+    questions_sent = 0
+    sent_questions = []
+    
+    def error_event(error, message):
+        return {'event': 'error', 'success': False, 'error': error, 'message': message}
+    
+    try:
+        cache_key = pdf_cache_key(content_hash, options, streamed=True)
+        cached = result_cache.get(cache_key)
+        CACHE_LOOKUPS.inc(cache='analysis', result='hit' if cached else 'miss')
+        # Questions streamed while the document is read depend on its page batches, so a
+        # repeated exam is replayed, from the exam cache or the exams stored with the analysis,
+        # rather than redrawn from the analysis
+        # A first run draws course distractors from the other documents only, so the key counts those
+        exam_key = exam_cache_key(cache_key, num_questions, options['seed'], options['course'], content_hash)
         
-        if not mcqs:
-            return jsonify({
-                'success': False,
-                'error': 'No questions generated',
-                'message': 'Could not generate MCQ questions from the PDF content. The document may not contain enough suitable information.'
-            }), 422
+        if cached:
+            logger.info(f"Cache hit for {filename}, skipping extraction and analysis")
+            yield {'event': 'progress', 'stage': 'generating'}
+            pages_processed = cached['pages_processed']
+            text_length = len(cached['text'])
+            index_document(options['course'], content_hash, cached['analysis']['entities'])
+            mcqs = cached_exam(exam_key, cached.get('exams'))
+            if mcqs is None:
+                mcqs = sample_questions(DocumentAnalysis.from_dict(cached['analysis']), num_questions, options['seed'],
+                                        course_entities(options['course']))
+            events = ({'event': 'question', 'question': mcq} for mcq in mcqs)
+        else:
+            # Fail fast on files PyPDF2 cannot read at all
+            try:
+                with open_pdf(pdf_path) as reader:
+                    total_pages = len(page_order(len(reader.pages), options['page_start'], options['page_end']))
+            except Exception as e:
+                logger.error(f"Error reading PDF: {str(e)}")
+                yield error_event('PDF processing error', 'Could not read the PDF file. Please ensure it is not corrupted.')
+                return
+            
+            yield {'event': 'progress', 'stage': 'extracting', 'pages_extracted': 0, 'total_pages': total_pages}
+            extracted_pages = []
+            
+            def page_texts():
+                for page in iter_pdf_pages(pdf_path, options['page_start'], options['page_end'],
+                                           spread=options['page_sampling'] == 'spread'):
+                    extracted_pages.append(page)
+                    if page.text.strip():
+                        yield page.text
+            
+            events = stream_pages(page_texts(), num_questions, stop_early=options['incremental'], seed=options['seed'],
+                                  corpus_entities=course_entities(options['course']))
         
-        # Shuffle questions for variety
-        import random
-        random.shuffle(mcqs)
+        analysis = None
+        for event in events:
+            if event['event'] == 'parsed':
+                yield {'event': 'progress', 'stage': 'parsing',
+                       'pages_analyzed': event['pages_analyzed'], 'total_pages': total_pages}
+            elif event['event'] == 'question':
+                mcq = event['question']
+                mcq['type'] = 'mcq'
+                if time_to_first_question is None:
+                    time_to_first_question = (datetime.now() - start_time).total_seconds()
+                yield {'event': 'question', 'index': questions_sent, 'question': mcq}
+                sent_questions.append(mcq)
+                questions_sent += 1
+            elif event['event'] == 'analysis':
+                analysis = event['analysis']
         
-        logger.info(f"Successfully generated {len(mcqs)} MCQ questions from PDF in {processing_time:.2f}s")
+        if not cached:
+            extraction = ExtractionResult(pages=sorted(extracted_pages, key=lambda page: page.number))
+            record_stage('pdf_extraction', sum(page.seconds for page in extraction.pages))
+            PAGES_EXTRACTED.inc(len(extraction.pages))
+            pages_processed = extraction.pages_processed
+            text_length = len(extraction.text)
+            if not extraction.text.strip():
+                yield error_event('No text extracted', 'Could not extract readable text from the PDF file')
+                return
+            if analysis:
+                result_cache.set(cache_key, {
+                    'text': extraction.text,
+                    'content_hash': content_hash,
+                    'pages_processed': pages_processed,
+                    'analysis': analysis.to_dict(),
+                    # Shared by all workers and kept as long as the analysis, unlike the exam cache
+                    'exams': {exam_key: sent_questions} if sent_questions else {}
+                })
+                index_document(options['course'], content_hash, analysis.entities)
         
-        return jsonify({
+        if not questions_sent:
+            yield error_event('No questions generated',
+                              'Could not generate MCQ questions from the PDF content. The document may not contain enough suitable information.')
+            return
+        
+        exam_cache.set(exam_key, {'questions': sent_questions})
+        
+        processing_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Streamed {questions_sent} MCQ questions from PDF in {processing_time:.2f}s "
+                    f"(first after {time_to_first_question:.2f}s)")
+        yield {
+            'event': 'done',
             'success': True,
-            'questions': mcqs,
+            'questions_sent': questions_sent,
             'processing_time': processing_time,
+            'time_to_first_question': time_to_first_question,
             'pages_processed': pages_processed,
-            'text_length': len(text)
-        })
+            'text_length': text_length,
+            'cached': cached is not None,
+            'analysis_id': cache_key,
+            'seed': options['seed']
+        }
+    
+    except Exception as e:
+        logger.error(f"Unexpected error while streaming questions for {filename}: {str(e)}")
+        yield error_event('Processing error', 'An unexpected error occurred while processing your request')
+    finally:
+        os.remove(pdf_path)
+
+@app.route('/generate_questions_from_pdf/stream', methods=['POST'])
+def stream_questions_from_pdf():
+    """Generate MCQs from PDF file, streaming progress and questions as newline-delimited JSON"""
+    try:
+        file, options, error_response = validate_pdf_request()
+        if error_response:
+            return error_response
+        
+        # Keep the spooled upload past the end of the request; the stream removes it
+        upload = file.stream
+        events = stream_pdf_events(upload.detach(), upload.sha256, file.filename, options)
+        return Response(
+            (json.dumps(event) + '\n' for event in events),
+            mimetype='application/x-ndjson',
+            # Ask reverse proxies not to buffer the stream
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
         
     except Exception as e:
-        logger.error(f"Unexpected error in generate_questions_from_pdf: {str(e)}")
+        logger.error(f"Unexpected error in stream_questions_from_pdf: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Processing error',
+            'message': 'An unexpected error occurred while processing your request'
+        }), 500
+
+def run_pdf_stream_job(pdf_path, content_hash, filename, options, progress):
+    """Background job wrapper around stream_pdf_events, publishing each MCQ as soon as it is built
+
+    Questions are added to the job's progress (progress.questions) as the pages
+    read so far support them, so pollers can show them while the rest of the
+    document is analyzed. The result is the done event plus all questions, or
+    the error event. stream_pdf_events owns and removes the spooled upload.
+    """
+    questions = []
+    result = {}
+    for event in stream_pdf_events(pdf_path, content_hash, filename, options):
+        kind = event.pop('event')
+        if kind == 'progress':
+            progress(**event)
+        elif kind == 'question':
+            questions.append(event['question'])
+            progress(questions=questions)
+        else:
+            result = event
+    
+    result['questions'] = questions
+    if result.get('success'):
+        result['status_code'] = 200
+    else:
+        result['status_code'] = 500 if result.get('error') == 'Processing error' else 422
+    return result
+
+def run_pdf_job(pdf_path, content_hash, filename, options, progress):
+    """Background job wrapper around process_pdf; owns and removes the spooled upload"""
+    try:
+        payload, status = process_pdf(pdf_path, content_hash, filename, options, progress)
+    except Exception as e:
+        logger.error(f"Unexpected error in PDF job for {filename}: {str(e)}")
+        payload, status = {
+            'success': False,
+            'error': 'Processing error',
+            'message': 'An unexpected error occurred while processing your request'
+        }, 500
+    finally:
+        os.remove(pdf_path)
+    payload['status_code'] = status
+    return payload
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue MCQ generation for a PDF and return a job id to poll"""
+    try:
+        file, options, error_response = validate_pdf_request()
+        if error_response:
+            return error_response
+        
+        # Keep the spooled upload past the end of the request for the job
+        upload = file.stream
+        # Streamed jobs publish questions while the document is still being read
+        run_job = run_pdf_stream_job if is_enabled(request.form.get('stream')) else run_pdf_job
+        job_id = job_queue.submit(run_job, upload.detach(), upload.sha256, file.filename, options)
+        logger.info(f"Queued job {job_id} for {file.filename}")
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f"/jobs/{job_id}"
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Unexpected error in submit_job: {str(e)}")
         return jsonify({
             'success': False,
             'error': 'Processing error',
             'message': 'An unexpected error occurred while processing your request'
         }), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status, progress and (once finished) result of a generation job"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found',
+            'message': 'Unknown or expired job id'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        **job
+    })
+
+@app.route('/generate_questions_from_analysis', methods=['POST'])
+def generate_questions_from_analysis():
+    """Draw a new set of MCQs from the stored analysis of a previously uploaded PDF"""
+    data = request.get_json(silent=True)
+    # A JSON array or string body is as malformed as no body at all
+    if not isinstance(data, dict):
+        data = {}
+    analysis_id = data.get('analysis_id')
+    if not analysis_id:
+        return jsonify({
+            'success': False,
+            'error': 'No analysis provided',
+            'message': 'analysis_id is required'
+        }), 400
+    if not is_cache_key(analysis_id):
+        return jsonify({
+            'success': False,
+            'error': 'Invalid analysis',
+            'message': 'analysis_id must be the 64-character id returned by the PDF endpoints'
+        }), 400
+    
+    try:
+        num_questions = int(data.get('num_questions', 5))
+        if num_questions < 1 or num_questions > 20:
+            raise ValueError()
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'Invalid number of questions',
+            'message': 'num_questions must be an integer between 1 and 20'
+        }), 400
+    
+    try:
+        seed = parse_seed(data.get('seed'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid seed',
+            'message': str(e)
+        }), 400
+    
+    try:
+        course = parse_course(data.get('course'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid course',
+            'message': str(e)
+        }), 400
+    
+    cached = result_cache.get(analysis_id)
+    CACHE_LOOKUPS.inc(cache='analysis', result='hit' if cached else 'miss')
+    if not cached:
+        return jsonify({
+            'success': False,
+            'error': 'Analysis not found',
+            'message': 'The analysis for this document has expired. Please upload the PDF again.'
+        }), 404
+    
+    start_time = datetime.now()
+    # Entries cached before content hashes were stored count as documents of their own
+    document_id = cached.get('content_hash', analysis_id)
+    with collect_timings() as timings:
+        index_document(course, document_id, cached['analysis']['entities'])
+        mcqs = exam_questions(analysis_id, lambda: DocumentAnalysis.from_dict(cached['analysis']), num_questions, seed,
+                              course, document_id, cached.get('exams'))
+    processing_time = (datetime.now() - start_time).total_seconds()
+    
+    if not mcqs:
+        return jsonify({
+            'success': False,
+            'error': 'No questions generated',
+            'message': 'Could not generate MCQ questions from the PDF content. The document may not contain enough suitable information.'
+        }), 422
+    
+    payload = {
+        'success': True,
+        'questions': mcqs,
+        'processing_time': processing_time,
+        'pages_processed': cached['pages_processed'],
+        'text_length': len(cached['text']),
+        'cached': True,
+        'analysis_id': analysis_id,
+        'seed': seed
+    }
+    if is_enabled(data.get('timings')):
+        payload['timings'] = timing_breakdown(timings)
+    return jsonify(payload)
+
+def parse_batch_item(item, default_num_questions):
+    """Normalize one /generate_questions item to (text, num_questions, seed, id), or raise ValueError"""
+    if isinstance(item, str):
+        item = {'text': item}
+    if not isinstance(item, dict) or not isinstance(item.get('text'), str):
+        raise ValueError('Each item must be a string or an object with a text field')
+    if not item['text'].strip():
+        raise ValueError('text is empty')
+    
+    try:
+        num_questions = int(item.get('num_questions', default_num_questions))
+    except (TypeError, ValueError):
+        num_questions = 0
+    if num_questions < 1 or num_questions > 20:
+        raise ValueError('num_questions must be an integer between 1 and 20')
+    
+    return item['text'], num_questions, parse_seed(item.get('seed')), item.get('id')
+
+@app.route('/generate_questions', methods=['POST'])
+def generate_questions():
+    """Generate MCQs for a batch of plain texts, parsed together through nlp.pipe"""
+    if not is_spacy_available():
+        return jsonify({
+            'success': False,
+            'error': 'NLP model not available',
+            'message': 'spaCy English model is not loaded. Please install it with: python -m spacy download en_core_web_sm'
+        }), 503
+    
+    data = request.get_json(silent=True)
+    # A JSON array or string body is as malformed as no body at all
+    if not isinstance(data, dict):
+        data = {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({
+            'success': False,
+            'error': 'No items provided',
+            'message': 'items must be a non-empty list of texts or {"text", "num_questions"} objects'
+        }), 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({
+            'success': False,
+            'error': 'Too many items',
+            'message': f"A request may contain at most {MAX_BATCH_ITEMS} items"
+        }), 413
+    
+    start_time = datetime.now()
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, *parse_batch_item(item, data.get('num_questions', 5))))
+        except ValueError as e:
+            results[index] = {
+                'id': item.get('id') if isinstance(item, dict) else None,
+                'success': False,
+                'error': 'Invalid item',
+                'message': str(e)
+            }
+    
+    # Analyses come back in order while later texts are still being parsed, so the
+    # time until each one arrives is what that item cost
+    item_start = datetime.now()
+    with collect_timings() as timings:
+        analyses = analyze_texts([text for _, text, _, _, _ in valid])
+        for (index, text, num_questions, seed, item_id), analysis in zip(valid, analyses):
+            mcqs = sample_questions(analysis, num_questions, seed) if analysis else []
+            for mcq in mcqs:
+                mcq['type'] = 'mcq'
+            now = datetime.now()
+            result = {'id': item_id, 'success': bool(mcqs), 'processing_time': (now - item_start).total_seconds(),
+                      'text_length': len(text), 'seed': seed}
+            item_start = now
+            if mcqs:
+                result['questions'] = mcqs
+            else:
+                result.update(error='No questions generated',
+                              message='The text may not contain enough suitable information.')
+            results[index] = result
+    
+    processing_time = (datetime.now() - start_time).total_seconds()
+    questions_generated = sum(len(result.get('questions', [])) for result in results)
+    logger.info(f"Generated {questions_generated} MCQ questions for {len(valid)} of {len(items)} texts "
+                f"in {processing_time:.2f}s")
+    
+    payload = {
+        'success': True,
+        'results': results,
+        'items': len(items),
+        'questions_generated': questions_generated,
+        'processing_time': processing_time
+    }
+    if is_enabled(data.get('timings')):
+        payload['timings'] = timing_breakdown(timings)
+    return jsonify(payload)
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters of the PDF result cache, the exam cache and, when enabled, the parsed document cache"""
+    stats = {
+        'success': True,
+        'cache': result_cache.stats(),
+        'exams': exam_cache.stats()
+    }
+    if generator.doc_cache is not None:
+        stats['docs'] = generator.doc_cache.stats()
+    return jsonify(stats)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Pipeline counters and stage latency histograms in the Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,109 @@
+"""Compare the scanning and the bucketed question assembly as documents grow
+
+Builds synthetic analyses with --sizes candidate questions (a long book has
+hundreds of thousands) and times drawing one exam of --num-questions from
+each, with the previous list-scanning selection and with the per-type
+buckets and random draws. Bucketing is timed on its own: it happens once per
+analysis, not once per exam. No spaCy model is needed.
+
+Usage: python -m benchmarks.bench_assembly [--sizes 1000 10000 100000 1000000] [--num-questions 20] [--repeat 5]
+"""
+import argparse
+import random
+import statistics
+
+from benchmarks.common import FIRST_NAMES, LAST_NAMES, ORGS, PLACES, time_call
+from candidate_pool import Candidate
+from mcq_generator import DocumentAnalysis, generator
+
+# Share of candidates per answer type, roughly what textbooks produce
+TYPE_WEIGHTS = {'PERSON': 40, 'GPE': 20, 'ORG': 15, 'DATE': 15, 'CARDINAL': 10}
+
+
+def legacy_mcqs(analysis: DocumentAnalysis, num_questions: int, rng: random.Random):
+    """The previous selection: shuffle a copy of every candidate, scan it per type, then once more"""
+    distractor_index = analysis.distractor_index()
+    candidates = list(analysis.candidates)
+    rng.shuffle(candidates)
+    used_answers = set()
+    mcqs = []
+
+    for entity_type in ['PERSON', 'ORG', 'GPE', 'DATE', 'EVENT', 'PRODUCT', 'MONEY', 'PERCENT']:
+        type_questions = [q for q in candidates if q.type == entity_type]
+        for item in type_questions:
+            if len(mcqs) >= num_questions:
+                return mcqs
+            if item.answer.lower() in used_answers:
+                continue
+            mcq = generator.create_fill_in_blank_question(
+                item.sentence, item.answer, item.type, distractor_index, rng, item.answer_start, item.answer_end)
+            if not mcq:
+                mcq = generator.create_direct_question(item.sentence, item.answer, item.type, distractor_index, rng)
+            if mcq:
+                used_answers.add(item.answer.lower())
+                mcqs.append(mcq)
+
+    remaining_questions = [q for q in candidates if q.answer.lower() not in used_answers]
+    for item in remaining_questions:
+        if len(mcqs) >= num_questions:
+            break
+        if item.answer.lower() in used_answers:
+            continue
+        mcq = generator.create_fill_in_blank_question(
+            item.sentence, item.answer, item.type, distractor_index, rng, item.answer_start, item.answer_end)
+        if mcq:
+            used_answers.add(item.answer.lower())
+            mcqs.append(mcq)
+    return mcqs
+
+
+def synthetic_analysis(candidates: int, seed: int = 0) -> DocumentAnalysis:
+    """An analysis with the given number of candidates over a few thousand distinct answers per type"""
+    rng = random.Random(seed)
+    answers = {
+        'PERSON': [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES],
+        'GPE': list(PLACES),
+        'ORG': [org.replace('the ', '') for org in ORGS],
+        'DATE': [str(year) for year in range(1700, 2000)],
+        'CARDINAL': [str(count) for count in range(2, 400)],
+    }
+    types = list(TYPE_WEIGHTS)
+    weights = list(TYPE_WEIGHTS.values())
+    items = []
+    for answer_type in rng.choices(types, weights, k=candidates):
+        answer = rng.choice(answers[answer_type])
+        prefix = f"Records from {rng.choice(PLACES)} show that "
+        items.append(Candidate(f"{prefix}{answer} was central to the work of {rng.choice(ORGS)}.", answer,
+                               answer_type, len(prefix), len(prefix) + len(answer)))
+    return DocumentAnalysis(entities=answers, key_phrases=[], candidates=items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--num-questions', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'candidates':>10} {'scan (ms)':>10} {'buckets (ms)':>13} {'bucketing once (ms)':>20}")
+    for size in args.sizes:
+        analysis = synthetic_analysis(size)
+        analysis.distractor_index()
+        bucket_time, _ = time_call(analysis.candidate_buckets)
+
+        legacy_times, bucket_times = [], []
+        for seed in range(args.repeat):
+            seconds, legacy = time_call(legacy_mcqs, analysis, args.num_questions, random.Random(seed))
+            legacy_times.append(seconds)
+            seconds, mcqs = time_call(generator.generate_mcqs_from_analysis, analysis, args.num_questions,
+                                      random.Random(seed))
+            bucket_times.append(seconds)
+            assert len(mcqs) == len(legacy) == args.num_questions
+            assert len({mcq['answer'].casefold() for mcq in mcqs}) == len(mcqs)
+
+        print(f"{size:>10} {statistics.median(legacy_times) * 1000:>10.2f} "
+              f"{statistics.median(bucket_times) * 1000:>13.2f} {bucket_time * 1000:>20.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Memory held by candidate questions with and without the bounded candidate pool
+
+Analyzes synthetic documents of --pages pages and reports, for an unbounded
+pool (every mention kept) and for the default pool size, how many candidates
+the analysis keeps and how much memory the analysis retains and peaks at
+while it is built (tracemalloc, Python allocations only).
+
+Usage: python -m benchmarks.bench_candidate_memory [--pages 10 100 1000] [--pool-size 1000]
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from benchmarks.common import require_nlp, synthetic_text
+
+
+def measure(generator, text: str):
+    """(candidates kept, mentions seen, retained bytes, peak bytes) of one analysis"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        analysis = generator.analyze_text(text)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return len(analysis.candidates), sum(analysis.candidate_counts.values()), current - baseline, peak - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--pool-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    require_nlp()
+    from mcq_generator import MCQGenerator
+
+    pools = [('unbounded', sys.maxsize), (f"pool {args.pool_size}", args.pool_size)]
+    print(f"{'pages':>6} {'pool':<12} {'mentions':>9} {'kept':>8} {'retained MB':>12} {'peak MB':>9}")
+    for pages in args.pages:
+        text = synthetic_text(pages)
+        for label, size in pools:
+            kept, mentions, retained, peak = measure(MCQGenerator(candidate_pool_size=size), text)
+            print(f"{pages:>6} {label:<12} {mentions:>9} {kept:>8} {retained / 1024 / 1024:>12.2f} "
+                  f"{peak / 1024 / 1024:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
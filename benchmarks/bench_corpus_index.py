@@ -0,0 +1,58 @@
+"""Time adding documents to a course's CorpusIndex and looking up its entities as the course grows
+
+Indexes --documents synthetic documents of --entities distinct entities each
+(drawn from a shared course vocabulary, so common names recur across
+documents) into a temporary SQLite file, and reports the time to add each
+document and the median time of the per-request lookup after every
+--report-every documents. No spaCy model is needed.
+
+Usage: python -m benchmarks.bench_corpus_index [--documents 500] [--entities 300] [--report-every 100]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+
+from benchmarks.common import time_call
+from corpus_index import CorpusIndex
+from mcq_generator import ENTITY_TYPES
+
+TYPES = ['PERSON', 'ORG', 'GPE', 'DATE', 'CARDINAL']
+
+
+def synthetic_document(entities: int, rng: random.Random, vocabulary: int = 20000):
+    """Distinct entities by type for one document, frequent course names more likely"""
+    document = {}
+    for _ in range(entities):
+        answer_type = rng.choice(TYPES)
+        name = int(rng.paretovariate(0.8)) % vocabulary
+        document.setdefault(answer_type, {})[f"{answer_type.title()} {name}"] = None
+    return {answer_type: list(names) for answer_type, names in document.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=500)
+    parser.add_argument('--entities', type=int, default=300)
+    parser.add_argument('--report-every', type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        index = CorpusIndex(os.path.join(directory, 'corpus.sqlite3'))
+        add_times = []
+        print(f"{'documents':>9} {'add (ms)':>9} {'lookup (ms)':>12} {'entities returned':>18}")
+        for number in range(1, args.documents + 1):
+            seconds, _ = time_call(index.add_document, 'course', f"document-{number}",
+                                   synthetic_document(args.entities, rng))
+            add_times.append(seconds)
+            if number % args.report_every == 0:
+                lookups = [time_call(index.entities, 'course', ENTITY_TYPES) for _ in range(20)]
+                returned = sum(map(len, lookups[0][1].values()))
+                print(f"{number:>9} {statistics.median(add_times[-args.report_every:]) * 1000:>9.2f} "
+                      f"{statistics.median(seconds for seconds, _ in lookups) * 1000:>12.2f} {returned:>18}")
+
+
+if __name__ == '__main__':
+    main()
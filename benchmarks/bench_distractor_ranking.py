@@ -0,0 +1,86 @@
+"""Per-question cost of similarity-ranked distractors versus random picks
+
+Uses the synthetic analysis from bench_distractors. Without --model, a blank
+English pipeline with random 300-dimensional vectors for every word stands in
+for a vectors model; pass --model en_core_web_md (or any installed model with
+vectors) to measure a real one.
+
+Usage: python -m benchmarks.bench_distractor_ranking [--questions 10000] [--model en_core_web_md]
+"""
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+import spacy
+
+from benchmarks.bench_distractors import synthetic_analysis
+from benchmarks.common import time_call
+from distractors import GENERIC_DISTRACTORS, DistractorIndex, has_vectors
+
+
+def synthetic_vectors_model(texts, width: int = 300, seed: int = 0):
+    """Blank English pipeline with a random vector for every word in texts"""
+    model = spacy.blank('en')
+    model.vocab.reset_vectors(width=width)
+    rng = np.random.default_rng(seed)
+    words = {token.text for text in texts for token in model.make_doc(text)}
+    for word in sorted(words):
+        model.vocab.set_vector(word, rng.standard_normal(width).astype(np.float32))
+    return model
+
+
+def per_question(index: DistractorIndex, questions, seed: int = 2):
+    """Seconds taken by each distractor lookup"""
+    rng = random.Random(seed)
+    timings = []
+    for answer, answer_type in questions:
+        start = time.perf_counter()
+        index.distractors(answer, answer_type, 3, rng)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=10000)
+    parser.add_argument('--entities', type=int, default=2000)
+    parser.add_argument('--phrases', type=int, default=5000)
+    parser.add_argument('--model', help="Installed spaCy model with word vectors")
+    args = parser.parse_args()
+
+    all_entities, key_phrases, key_phrase_pos = synthetic_analysis(args.entities, args.phrases)
+    rng = random.Random(1)
+    types = list(all_entities)
+    questions = []
+    for _ in range(args.questions):
+        answer_type = rng.choice(types)
+        questions.append((rng.choice(all_entities[answer_type]), answer_type))
+
+    if args.model:
+        model = spacy.load(args.model)
+    else:
+        texts = [*key_phrases, *(ent for ents in all_entities.values() for ent in ents),
+                 *(opt for opts in GENERIC_DISTRACTORS.values() for opt in opts)]
+        model = synthetic_vectors_model(texts)
+    if not has_vectors(model):
+        raise SystemExit(f"{args.model} has no word vectors")
+
+    random_index = DistractorIndex(all_entities, key_phrases, key_phrase_pos)
+    ranked_index = DistractorIndex(all_entities, key_phrases, key_phrase_pos, model)
+    # The first lookup per pool builds its vector matrix; time that once, separately
+    warm_up_time, _ = time_call(per_question, ranked_index, questions[:200])
+
+    print(f"{len(questions)} questions, {sum(map(len, all_entities.values()))} entities, "
+          f"{len(key_phrases)} key phrases, vector width {model.vocab.vectors.shape[1]}")
+    print(f"first 200 lookups incl. matrix builds: {warm_up_time:.3f}s")
+    print(f"{'method':<10} {'mean (ms)':>10} {'p95 (ms)':>10}")
+    for name, index in [('random', random_index), ('ranked', ranked_index)]:
+        timings = sorted(per_question(index, questions))
+        p95 = timings[int(len(timings) * 0.95)]
+        print(f"{name:<10} {statistics.mean(timings) * 1000:>10.4f} {p95 * 1000:>10.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Compare the per-question distractor scan with the per-document DistractorIndex
+
+Builds a synthetic document analysis (entity lists and key phrases the size a
+long textbook produces) and times picking distractors for every candidate
+question both ways. No spaCy model is needed.
+
+Usage: python -m benchmarks.bench_distractors [--questions 10000] [--entities 2000] [--phrases 5000]
+"""
+import argparse
+import random
+from typing import Dict, List
+
+from benchmarks.common import FIRST_NAMES, LAST_NAMES, ORGS, PLACES, TOPICS, time_call
+from distractors import GENERIC_DISTRACTORS, DistractorIndex
+
+
+def legacy_distractors(correct_answer: str, answer_type: str, all_entities: Dict,
+                       key_phrases: List[str], rng: random.Random) -> List[str]:
+    """The previous MCQGenerator.generate_distractors, which filtered every list per question"""
+    distractors = []
+
+    if answer_type in all_entities and all_entities[answer_type]:
+        candidates = [ent for ent in all_entities[answer_type]
+                      if ent != correct_answer and ent.lower() != correct_answer.lower()]
+        if candidates:
+            distractors.extend(rng.sample(candidates, min(len(candidates), 3)))
+
+    if len(distractors) < 3:
+        phrase_candidates = [phrase for phrase in key_phrases
+                             if phrase != correct_answer and
+                             phrase.lower() != correct_answer.lower() and
+                             phrase not in distractors and
+                             len(phrase.split()) <= 3]
+        needed = 3 - len(distractors)
+        if phrase_candidates:
+            distractors.extend(rng.sample(phrase_candidates, min(len(phrase_candidates), needed)))
+
+    if len(distractors) < 3 and answer_type in GENERIC_DISTRACTORS:
+        generic_options = [opt for opt in GENERIC_DISTRACTORS[answer_type]
+                           if opt != correct_answer and opt not in distractors]
+        needed = 3 - len(distractors)
+        if generic_options:
+            distractors.extend(rng.sample(generic_options, min(len(generic_options), needed)))
+
+    return distractors[:3]
+
+
+def synthetic_analysis(entities: int, phrases: int, seed: int = 0):
+    """Entity lists, key phrases with tags, and candidate questions for one large document"""
+    rng = random.Random(seed)
+    people = list(dict.fromkeys(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}" for i in range(entities)))
+    all_entities = {
+        'PERSON': people,
+        'GPE': [f"{place} {i}" for i, place in enumerate(PLACES * 5)],
+        'ORG': list(ORGS),
+        # A type with a single entity falls through to key phrases and the generic table
+        'WORK_OF_ART': ['Principia'],
+    }
+    key_phrases = []
+    key_phrase_pos = {}
+    for i in range(phrases):
+        topic = rng.choice(TOPICS)
+        phrase, pos = rng.choice([(f"{topic} {i}", 'CHUNK'), (f"term{i}", 'NOUN'), (f"studied{i}", 'VERB')])
+        key_phrases.append(phrase)
+        key_phrase_pos[phrase] = pos
+    return all_entities, key_phrases, key_phrase_pos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=10000)
+    parser.add_argument('--entities', type=int, default=2000)
+    parser.add_argument('--phrases', type=int, default=5000)
+    args = parser.parse_args()
+
+    all_entities, key_phrases, key_phrase_pos = synthetic_analysis(args.entities, args.phrases)
+    rng = random.Random(1)
+    types = list(all_entities)
+    questions = []
+    for _ in range(args.questions):
+        answer_type = rng.choice(types)
+        questions.append((rng.choice(all_entities[answer_type]), answer_type))
+
+    def run_legacy():
+        rng = random.Random(2)
+        return [legacy_distractors(answer, answer_type, all_entities, key_phrases, rng)
+                for answer, answer_type in questions]
+
+    def run_index():
+        rng = random.Random(2)
+        index = DistractorIndex(all_entities, key_phrases, key_phrase_pos)
+        return [index.distractors(answer, answer_type, 3, rng) for answer, answer_type in questions]
+
+    legacy_time, legacy_result = time_call(run_legacy)
+    index_time, index_result = time_call(run_index)
+
+    for (answer, _), options in zip(questions, index_result):
+        assert len(options) == 3 and answer.lower() not in {option.lower() for option in options}
+
+    print(f"{len(questions)} questions, {sum(map(len, all_entities.values()))} entities, {len(key_phrases)} key phrases")
+    print(f"{'method':<10} {'seconds':>9} {'questions/sec':>14}")
+    print(f"{'scan':<10} {legacy_time:>9.3f} {len(questions) / legacy_time:>14.0f}")
+    print(f"{'index':<10} {index_time:>9.3f} {len(questions) / index_time:>14.0f}")
+    print(f"speedup: {legacy_time / index_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Compare parsing chunks with spaCy against loading them back from the DocBin doc cache
+
+For each page count, splits synthetic text into chunks and times parsing them
+without a cache, parsing and storing them in an empty DocCache (cold), and
+loading them back from it (warm), then the whole analysis with a warm cache.
+Also reports the bytes the cache holds. Uses the installed spaCy model.
+
+Usage: python -m benchmarks.bench_doc_cache [--pages 10 100 1000]
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import require_nlp, synthetic_text, time_call
+from doc_cache import DocCache
+from mcq_generator import MCQGenerator, split_into_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    require_nlp()
+    print(f"{'pages':>6} {'parse (s)':>10} {'cold (s)':>9} {'warm (s)':>9} {'speedup':>8} "
+          f"{'warm analysis (s)':>18} {'cache (MB)':>11}")
+    for pages in args.pages:
+        text = synthetic_text(pages)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DocCache(directory)
+            uncached = MCQGenerator()
+            cached = MCQGenerator(doc_cache=cache)
+            chunks = split_into_chunks(text, cached.max_chunk_size)
+
+            parse, _ = time_call(lambda: list(uncached._parse_chunks(chunks)))
+            cold, _ = time_call(lambda: list(cached._parse_chunks(chunks)))
+            warm, _ = time_call(lambda: list(cached._parse_chunks(chunks)))
+            analysis, _ = time_call(cached.analyze_text, text)
+            size = sum(entry.stat().st_size for entry in os.scandir(directory))
+            print(f"{pages:>6} {parse:>10.2f} {cold:>9.2f} {warm:>9.2f} {parse / warm:>7.1f}x "
+                  f"{analysis:>18.2f} {size / 1024 / 1024:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Compare merging chunk entities through Python lists with the hash-based EntityStore
+
+Builds synthetic per-chunk entity mentions (a long document's worth, with the
+repeats real text has) and merges them both ways: the previous lists extended
+per chunk and deduplicated at the end, and the EntityStore. It also merges
+the page-batch analyses of incremental processing, where the lists used to be
+deduplicated again after every batch. Reports time and peak traced memory
+(tracemalloc, Python allocations only). No spaCy model is needed.
+
+Usage: python -m benchmarks.bench_entity_store [--chunks 200] [--mentions 5000] [--vocabulary 50000]
+"""
+import argparse
+import random
+import tracemalloc
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from benchmarks.common import time_call
+from entity_store import EntityStore
+
+TYPES = ['PERSON', 'ORG', 'GPE', 'DATE', 'CARDINAL']
+
+
+def synthetic_chunks(chunks: int, mentions: int, vocabulary: int, seed: int = 0) -> List[List[Tuple[str, int]]]:
+    """(entity type, name number) of every mention per chunk, with a long tail of rare names"""
+    rng = random.Random(seed)
+    # Pareto draws: a few names recur everywhere, most appear once or twice
+    return [[(rng.choice(TYPES), int(rng.paretovariate(0.6)) % vocabulary) for _ in range(mentions)]
+            for _ in range(chunks)]
+
+
+def iter_chunks(chunk_mentions: List[List[Tuple[str, int]]]) -> Iterator[Dict[str, List[str]]]:
+    """Mention strings per type, built afresh for each chunk the way spaCy spans build them"""
+    for mentions in chunk_mentions:
+        by_type = {}
+        for answer_type, name in mentions:
+            by_type.setdefault(answer_type, []).append(f"{answer_type.title()} number {name}")
+        yield by_type
+
+
+def legacy_chunk_merge(chunk_mentions: Iterable[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    """The previous _analyze_docs: dedup per chunk, extend per type, dedup again at the end"""
+    all_entities = {}
+    for by_type in chunk_mentions:
+        for entity_type, mentions in by_type.items():
+            all_entities.setdefault(entity_type, []).extend(dict.fromkeys(mentions))
+    return {entity_type: list(dict.fromkeys(entities)) for entity_type, entities in all_entities.items()}
+
+
+def store_chunk_merge(chunk_mentions: Iterable[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    store = EntityStore()
+    for by_type in chunk_mentions:
+        for entity_type, mentions in by_type.items():
+            store.add(entity_type, mentions)
+    return {entity_type: store.texts(entity_type) for entity_type in store.entity_types()}
+
+
+def legacy_batch_merge(batches: Iterable[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    """The previous DocumentAnalysis.merge, which rebuilt every list on every batch"""
+    entities = {}
+    for batch in batches:
+        for entity_type, batch_entities in batch.items():
+            entities[entity_type] = list(dict.fromkeys(entities.get(entity_type, []) + batch_entities))
+    return entities
+
+
+def store_batch_merge(batches: Iterable[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    store = EntityStore(keep_strings=False)
+    entities = {}
+    for batch in batches:
+        for entity_type, batch_entities in batch.items():
+            added = store.add(entity_type, batch_entities)
+            if added:
+                entities.setdefault(entity_type, []).extend(added)
+    return entities
+
+
+def measure(func, inputs: Callable[[], Iterable]):
+    """(seconds, peak traced bytes, result) of func over fresh inputs; memory is traced in a second run"""
+    seconds, result = time_call(func, inputs())
+    tracemalloc.start()
+    try:
+        func(inputs())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chunks', type=int, default=200)
+    parser.add_argument('--mentions', type=int, default=5000)
+    parser.add_argument('--vocabulary', type=int, default=50000)
+    args = parser.parse_args()
+
+    chunk_mentions = synthetic_chunks(args.chunks, args.mentions, args.vocabulary)
+
+    def batches():
+        # Page-batch analyses carry each batch's distinct entities
+        for by_type in iter_chunks(chunk_mentions):
+            yield {entity_type: list(dict.fromkeys(mentions)) for entity_type, mentions in by_type.items()}
+
+    print(f"{args.chunks} chunks of {args.mentions} mentions (mention strings are built inside the measured runs)")
+    print(f"{'merge':<14} {'method':<8} {'seconds':>9} {'peak MB':>9} {'distinct':>9}")
+    for label, legacy, store, inputs in [
+            ('chunks', legacy_chunk_merge, store_chunk_merge, lambda: iter_chunks(chunk_mentions)),
+            ('page batches', legacy_batch_merge, store_batch_merge, batches)]:
+        legacy_time, legacy_peak, legacy_result = measure(legacy, inputs)
+        store_time, store_peak, store_result = measure(store, inputs)
+        assert legacy_result == store_result
+        distinct = sum(map(len, store_result.values()))
+        print(f"{label:<14} {'lists':<8} {legacy_time:>9.3f} {legacy_peak / 1024 / 1024:>9.2f} {distinct:>9}")
+        print(f"{label:<14} {'store':<8} {store_time:>9.3f} {store_peak / 1024 / 1024:>9.2f} {distinct:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Compare the three-pass and the single-pass (attribute array) key phrase extraction
+
+Parses synthetic text into one Doc of about --tokens tokens, checks that both
+implementations return the same phrases and tags, and times them.
+
+Usage: python -m benchmarks.bench_key_phrases [--tokens 1000000] [--repeat 3]
+"""
+import argparse
+from collections import Counter
+
+from spacy.tokens import Doc
+
+from benchmarks.common import PAGE_CHARS, require_nlp, synthetic_text, time_call
+
+
+def legacy_key_phrases_with_pos(doc):
+    """The previous extract_key_phrases_with_pos: noun chunks, then two more passes over every token"""
+    key_phrases = []
+    phrase_pos = {}
+
+    if doc.has_annotation("DEP"):
+        for chunk in doc.noun_chunks:
+            chunk_text = chunk.text.strip()
+            if 2 <= len(chunk_text.split()) <= 5 and len(chunk_text) > 3:
+                if not chunk.root.pos_ in ['PRON', 'DET']:
+                    key_phrases.append(chunk_text)
+                    phrase_pos.setdefault(chunk_text, 'CHUNK')
+
+    for token in doc:
+        if (token.pos_ in ['NOUN', 'PROPN'] and
+                len(token.text) > 3 and
+                not token.is_stop and
+                token.is_alpha and
+                not token.text.lower() in ['said', 'says', 'according', 'including']):
+            key_phrases.append(token.text)
+            phrase_pos.setdefault(token.text, token.pos_)
+
+    for token in doc:
+        if (token.pos_ == 'VERB' and
+                len(token.text) > 3 and
+                not token.is_stop and
+                token.text.lower() not in ['is', 'are', 'was', 'were', 'have', 'has', 'had']):
+            key_phrases.append(token.text)
+            phrase_pos.setdefault(token.text, 'VERB')
+
+    phrase_counts = Counter(key_phrases)
+    top_phrases = [phrase for phrase, count in phrase_counts.most_common(100)]
+    return top_phrases, {phrase: phrase_pos[phrase] for phrase in top_phrases}
+
+
+def build_doc(nlp, tokens: int) -> Doc:
+    """Parse synthetic pages until the combined Doc has at least the requested tokens"""
+    docs = []
+    total = 0
+    seed = 0
+    while total < tokens:
+        # About 550 tokens per synthetic page
+        pages = max(1, (tokens - total) // 550 + 1)
+        for doc in nlp.pipe(synthetic_text(min(pages, 300), seed).split('\n'), batch_size=64):
+            docs.append(doc)
+            total += len(doc)
+        seed += 1
+    return Doc.from_docs(docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    nlp = require_nlp()
+    from mcq_generator import generator
+
+    parse_time, doc = time_call(build_doc, nlp, args.tokens)
+    print(f"Parsed {len(doc)} tokens (~{len(doc.text) // PAGE_CHARS} pages) in {parse_time:.1f}s")
+
+    legacy_times, fused_times = [], []
+    for _ in range(args.repeat):
+        seconds, legacy = time_call(legacy_key_phrases_with_pos, doc)
+        legacy_times.append(seconds)
+        seconds, fused = time_call(generator.extract_key_phrases_with_pos, doc)
+        fused_times.append(seconds)
+    if legacy != fused:
+        raise SystemExit("Outputs differ between the legacy and single-pass extraction")
+
+    legacy_best, fused_best = min(legacy_times), min(fused_times)
+    print(f"{'method':<12} {'best (s)':>9} {'tokens/sec':>12}")
+    print(f"{'three-pass':<12} {legacy_best:>9.3f} {len(doc) / legacy_best:>12.0f}")
+    print(f"{'single-pass':<12} {fused_best:>9.3f} {len(doc) / fused_best:>12.0f}")
+    print(f"speedup: {legacy_best / fused_best:.1f}x (identical output: {len(fused[0])} phrases)")
+
+
+if __name__ == '__main__':
+    main()
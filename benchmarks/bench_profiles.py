@@ -0,0 +1,66 @@
+"""Compare parse throughput and memory of the spaCy generation profiles
+
+Each profile runs in a fresh interpreter so the RSS figures are not shared.
+
+Usage: python -m benchmarks.bench_profiles [--pages 50] [--profiles full default fast]
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.common import synthetic_text
+
+
+def run_profile(profile: str, pages: int) -> dict:
+    """Load the model with one profile and parse the synthetic text (child process)"""
+    import mcq_generator
+
+    start = time.perf_counter()
+    model = mcq_generator.load_nlp(profile=profile)
+    load_time = time.perf_counter() - start
+
+    chunks = mcq_generator.split_into_chunks(synthetic_text(pages))
+    tokens = 0
+    start = time.perf_counter()
+    for doc in model.pipe(chunks):
+        tokens += len(doc)
+    parse_time = time.perf_counter() - start
+
+    return {
+        'profile': profile,
+        'components': model.pipe_names,
+        'load_seconds': round(load_time, 3),
+        'tokens': tokens,
+        'tokens_per_second': round(tokens / parse_time),
+        # ru_maxrss is reported in kilobytes on Linux
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--profiles', nargs='+', default=['full', 'default', 'fast'])
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args.child, args.pages)))
+        return
+
+    print(f"{'profile':<10} {'tokens/sec':>12} {'max RSS (MB)':>13} {'load (s)':>9}  components")
+    for profile in args.profiles:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_profiles', '--child', profile, '--pages', str(args.pages)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{result['profile']:<10} {result['tokens_per_second']:>12,} {result['max_rss_mb']:>13} "
+              f"{result['load_seconds']:>9}  {', '.join(result['components'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Compare candidate-question collection with and without re-parsing every sentence
+
+Usage: python -m benchmarks.bench_sentence_parse [--pages 200]
+"""
+import argparse
+
+from benchmarks.common import require_nlp, synthetic_text, time_call
+from mcq_generator import MCQGenerator
+
+
+def legacy_candidates(nlp, doc, entity_types, min_sentence_length):
+    """The previous implementation: run the full pipeline again for every sentence"""
+    candidates = []
+    for sent in doc.sents:
+        sent_text = sent.text.strip()
+        if len(sent_text) < min_sentence_length:
+            continue
+        sent_doc = nlp(sent_text)
+        for ent in sent_doc.ents:
+            if ent.label_ in entity_types and len(ent.text.strip()) > 1 and len(sent_text) <= 300:
+                candidates.append((sent_text, ent.text.strip(), ent.label_))
+    return candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    args = parser.parse_args()
+
+    nlp = require_nlp()
+    generator = MCQGenerator()
+    text = ' '.join(synthetic_text(args.pages).split())
+    chunks = [text[i:i + 1000000] for i in range(0, len(text), 1000000)]
+
+    parse_time = 0.0
+    legacy_time = 0.0
+    single_time = 0.0
+    legacy = []
+    single = []
+    for chunk in chunks:
+        elapsed, doc = time_call(nlp, chunk)
+        parse_time += elapsed
+        entity_types = generator.extract_entities(doc)
+
+        elapsed, found = time_call(legacy_candidates, nlp, doc, entity_types, generator.min_sentence_length)
+        legacy_time += elapsed
+        legacy.extend(found)
+
+        elapsed, found = time_call(generator.find_candidate_questions, doc, entity_types)
+        single_time += elapsed
+        single.extend((c.sentence, c.answer, c.type) for c in found)
+
+    print(f"Text: {args.pages} pages, {len(text):,} characters, {len(chunks)} chunk(s)")
+    print(f"Chunk parse:                {parse_time:8.2f}s")
+    print(f"Legacy candidates (reparse): {legacy_time:7.2f}s  ({len(legacy)} candidates)")
+    print(f"Single-parse candidates:    {single_time:8.2f}s  ({len(single)} candidates)")
+    print(f"Total parse cost: {parse_time + legacy_time:.2f}s -> {parse_time + single_time:.2f}s")
+    same = set(legacy) == set(single)
+    print(f"Identical candidate sets: {same}")
+    if not same:
+        print(f"  only in legacy: {len(set(legacy) - set(single))}, only in single-parse: {len(set(single) - set(legacy))}")
+
+
+if __name__ == '__main__':
+    main()
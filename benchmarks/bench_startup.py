@@ -0,0 +1,83 @@
+"""Compare gunicorn startup with and without app preloading
+
+Reports time-to-first-request and per-worker memory. PSS (proportional set
+size) splits shared pages between the processes sharing them, so it shows how
+much copy-on-write sharing of the preloaded model saves; RSS counts shared
+pages in full for every worker.
+
+Usage: python -m benchmarks.bench_startup [--workers 4] [--port 5056]
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import time
+
+
+def memory_mb(pid: int) -> dict:
+    """RSS and PSS of a process in MB, from /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in ('Rss', 'Pss'):
+                values[name.lower()] = int(rest.split()[0]) / 1024
+    return values
+
+
+def child_pids(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def first_response_time(port: int, start: float, timeout: float = 300) -> float:
+    """Seconds from start until the server answers a request"""
+    while time.perf_counter() - start < timeout:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            conn.request('GET', '/cache/stats')
+            if conn.getresponse().status == 200:
+                return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("Server did not start")
+
+
+def run(preload: bool, workers: int, port: int) -> None:
+    env = dict(os.environ, MCQ_PRELOAD='1' if preload else '0', WEB_CONCURRENCY=str(workers))
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f"127.0.0.1:{port}", 'app:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        ttfr = first_response_time(port, start)
+        # Give the remaining workers time to finish booting and warming up
+        time.sleep(2 if preload else 10)
+        worker_memory = [memory_mb(pid) for pid in child_pids(server.pid)]
+        master_memory = memory_mb(server.pid)
+
+        rss = sum(m['rss'] for m in worker_memory) / len(worker_memory)
+        pss = sum(m['pss'] for m in worker_memory) / len(worker_memory)
+        total = master_memory['pss'] + sum(m['pss'] for m in worker_memory)
+        print(f"{'preload' if preload else 'no preload':<11} first request {ttfr:6.2f}s   "
+              f"per worker: RSS {rss:6.0f} MB, PSS {pss:6.0f} MB   total PSS {total:6.0f} MB")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5056)
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers")
+    run(False, args.workers, args.port)
+    run(True, args.workers, args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Measure peak server RSS while a large PDF is uploaded to /generate_questions_from_pdf
+
+The app runs in a child process so the figures only cover the server side.
+
+Usage: python -m benchmarks.bench_upload_memory [--size-mb 200] [--port 5055]
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from benchmarks.common import synthetic_pdf
+
+
+def peak_rss_mb(pid: int) -> float:
+    """Peak resident set size (VmHWM) of a process in MB"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmHWM not available")
+
+
+def write_multipart_body(path: str, pdf_bytes: bytes, boundary: str) -> None:
+    with open(path, 'wb') as f:
+        f.write(f"--{boundary}\r\nContent-Disposition: form-data; name=\"num_questions\"\r\n\r\n5\r\n".encode())
+        f.write(f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"large.pdf\"\r\n"
+                f"Content-Type: application/pdf\r\n\r\n".encode())
+        f.write(pdf_bytes)
+        f.write(f"\r\n--{boundary}--\r\n".encode())
+
+
+def wait_for_server(port: int, timeout: float = 120) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/cache/stats')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError("Server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=200)
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    boundary = uuid.uuid4().hex
+    body_path = os.path.join(tempfile.gettempdir(), f"mcq-bench-{boundary}.body")
+    write_multipart_body(body_path, synthetic_pdf(args.pages, padding=args.size_mb * 1024 * 1024), boundary)
+
+    server = subprocess.Popen(
+        [sys.executable, '-c', f"from app import app; app.run(port={args.port}, threaded=False)"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_server(args.port)
+        rss_before = peak_rss_mb(server.pid)
+
+        conn = http.client.HTTPConnection('127.0.0.1', args.port, timeout=600)
+        start = time.perf_counter()
+        with open(body_path, 'rb') as body:
+            conn.request('POST', '/generate_questions_from_pdf', body=body, headers={
+                'Content-Type': f"multipart/form-data; boundary={boundary}",
+                'Content-Length': str(os.path.getsize(body_path)),
+            })
+        response = conn.getresponse()
+        result = json.loads(response.read())
+        elapsed = time.perf_counter() - start
+
+        rss_after = peak_rss_mb(server.pid)
+        if not result.get('success'):
+            print(f"Request failed: {result.get('message')}")
+        print(f"Upload: {os.path.getsize(body_path) / 1024 / 1024:.0f} MB, HTTP {response.status}, "
+              f"{len(result.get('questions', []))} questions in {elapsed:.1f}s")
+        print(f"Server peak RSS: {rss_before:.0f} MB before, {rss_after:.0f} MB after "
+              f"(+{rss_after - rss_before:.0f} MB)")
+    finally:
+        server.terminate()
+        server.wait()
+        os.remove(body_path)
+
+
+if __name__ == '__main__':
+    main()
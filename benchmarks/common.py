@@ -0,0 +1,123 @@
+"""Shared helpers for the benchmark scripts"""
+import random
+import sys
+import textwrap
+import time
+from typing import Any, Callable, List, Tuple
+
+FIRST_NAMES = ['Ada', 'Alan', 'Grace', 'Isaac', 'Marie', 'Niels', 'Rosalind', 'Charles', 'Emmy', 'Werner']
+LAST_NAMES = ['Lovelace', 'Turing', 'Hopper', 'Newton', 'Curie', 'Bohr', 'Franklin', 'Darwin', 'Noether', 'Heisenberg']
+PLACES = ['London', 'Paris', 'Berlin', 'Vienna', 'Cambridge', 'Copenhagen', 'Rome', 'Madrid', 'Boston', 'Tokyo']
+ORGS = ['the Royal Society', 'Princeton University', 'the University of Oxford', 'the Sorbonne',
+        'the Max Planck Institute', 'Bell Labs', 'the British Museum', 'Harvard University']
+TOPICS = ['thermodynamics', 'the theory of relativity', 'radioactivity', 'computation', 'natural selection',
+          'quantum mechanics', 'crystallography', 'abstract algebra', 'electromagnetism', 'genetics']
+
+SENTENCE_TEMPLATES = [
+    "{person} was born in {place} in {year}.",
+    "In {year}, {person} joined {org} to work on {topic}.",
+    "The lectures of {person} at {org} changed how students understood {topic}.",
+    "{person} moved to {place} after receiving a grant of ${amount} from {org}.",
+    "By {year}, nearly {percent}% of the research at {org} focused on {topic}.",
+    "Historians describe the work of {person} on {topic} as a turning point for {place}.",
+    "The experiments carried out in {place} between {year} and {year2} confirmed earlier results on {topic}.",
+    "{org} published {count} papers on {topic} during the tenure of {person}.",
+]
+
+# Roughly one printed textbook page
+PAGE_CHARS = 3000
+
+
+def synthetic_pages(pages: int, seed: int = 0) -> List[str]:
+    """Build reproducible textbook-like pages of paragraphs"""
+    rng = random.Random(seed)
+    page_texts = []
+    for _ in range(pages):
+        paragraphs = []
+        size = 0
+        while size < PAGE_CHARS:
+            sentences = []
+            for _ in range(rng.randint(3, 6)):
+                sentences.append(rng.choice(SENTENCE_TEMPLATES).format(
+                    person=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    place=rng.choice(PLACES),
+                    org=rng.choice(ORGS),
+                    topic=rng.choice(TOPICS),
+                    year=rng.randint(1700, 2000),
+                    year2=rng.randint(1700, 2000),
+                    amount=f"{rng.randint(1, 900)},000",
+                    percent=rng.randint(1, 99),
+                    count=rng.randint(2, 400),
+                ))
+            paragraph = ' '.join(sentences)
+            paragraphs.append(paragraph)
+            size += len(paragraph)
+        page_texts.append('\n\n'.join(paragraphs))
+    return page_texts
+
+
+def synthetic_text(pages: int, seed: int = 0) -> str:
+    """Synthetic pages joined the way extracted PDF text is"""
+    return '\f'.join(synthetic_pages(pages, seed))
+
+
+def time_call(func: Callable, *args, **kwargs) -> Tuple[float, Any]:
+    """Run a callable once and return (elapsed seconds, result)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def require_nlp():
+    """Return the module-level spaCy model or exit with a helpful message"""
+    from mcq_generator import nlp
+    if nlp is None:
+        sys.exit("spaCy English model not found. Please install it with: python -m spacy download en_core_web_sm")
+    return nlp
+
+
+def _pdf_string(line: str) -> str:
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def synthetic_pdf(pages: int, seed: int = 0, padding: int = 0) -> bytes:
+    """Build a PDF whose pages carry synthetic_text, one page of text per PDF page
+
+    padding adds roughly that many bytes of PDF comments to inflate the file size.
+    """
+    return pdf_from_pages(synthetic_pages(pages, seed), padding)
+
+
+def pdf_from_pages(page_texts: List[str], padding: int = 0) -> bytes:
+    """Build a PDF with one page per text (Latin-1 text, Helvetica, wrapped at 95 characters)"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page_text in page_texts:
+        lines = textwrap.wrap(' '.join(page_text.split()), 95)
+        content = "BT /F1 9 Tf 36 806 Td 11 TL " + ' '.join(f"({_pdf_string(line)}) '" for line in lines) + " ET"
+        content = content.encode('latin-1')
+        kids.append(len(objects) + 1)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects) + 2} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length " + str(len(content)).encode() + b" >>\nstream\n" + content + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n")
+    padding_line = b"%" + b"x" * 1022 + b"\n"
+    output += padding_line * (padding // len(padding_line))
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(output)
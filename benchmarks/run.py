@@ -0,0 +1,215 @@
+"""Time every stage of the generation pipeline on bundled and synthetic corpora
+
+Stages: PDF extraction, normalization (chunking and cleanup), spaCy parse,
+entity/key phrase extraction, candidate building, distractor generation and
+question assembly. Each stage runs --repeat times on the output of the
+previous stage and reports p50/p95 latency and throughput; one extra run under
+tracemalloc measures its peak Python memory. Inputs and seeds are fixed so
+runs on different commits or machines are comparable.
+
+Corpora: synthetic:<pages> (textbook-like, see common.synthetic_pages) or the
+name of a file in benchmarks/corpora, optionally :<copies> to repeat it as
+that many pages.
+
+Usage: python -m benchmarks.run [--corpora gettysburg gettysburg:50 synthetic:10 synthetic:100]
+                                [--repeat 5] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import spacy
+
+from benchmarks.common import pdf_from_pages, require_nlp, synthetic_pages
+from distractors import DistractorIndex
+
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpora')
+
+
+def load_corpus(spec: str, seed: int) -> List[str]:
+    """Page texts of a corpus spec"""
+    name, _, count = spec.partition(':')
+    if name == 'synthetic':
+        return synthetic_pages(int(count or 10), seed)
+    with open(os.path.join(CORPORA_DIR, f"{name}.txt")) as f:
+        text = f.read()
+    return [text] * int(count or 1)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run_stage(func: Callable[[], Tuple[float, Any]], repeat: int) -> Tuple[List[float], float, Any, int]:
+    """Time func repeat times, then once more under tracemalloc
+
+    func returns (units processed, output); returns (timings, units, output, peak bytes).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        units, output = func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return timings, units, output, peak
+
+
+def benchmark_corpus(spec: str, repeat: int, num_questions: int, seed: int) -> List[Dict[str, Any]]:
+    from mcq_generator import DocumentAnalysis, generator, split_into_chunks
+
+    page_texts = load_corpus(spec, seed)
+    results = []
+
+    def record(stage, unit, func):
+        timings, units, output, peak = run_stage(func, repeat)
+        p50 = percentile(timings, 0.5)
+        results.append({
+            'corpus': spec,
+            'stage': stage,
+            'runs': repeat,
+            'p50_ms': round(p50 * 1000, 3),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+            'units': units,
+            'unit': unit,
+            'throughput': round(units / p50, 1) if p50 else None,
+            'peak_memory_mb': round(peak / 1024 / 1024, 2),
+        })
+        return output
+
+    fd, pdf_path = tempfile.mkstemp(suffix='.pdf')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pdf_from_pages(page_texts))
+    try:
+        from pdf_extraction import extract_pdf_text
+
+        def extraction():
+            result = extract_pdf_text(pdf_path, processes=1)
+            return len(result.pages), result.text
+        text = record('pdf_extraction', 'pages', extraction)
+    finally:
+        os.remove(pdf_path)
+
+    def normalization():
+        return len(text) / 1024 / 1024, split_into_chunks(text, generator.max_chunk_size)
+    chunks = record('normalization', 'MB', normalization)
+
+    def parse():
+        docs = list(generator._parse_chunks(chunks))
+        return sum(len(doc) for doc in docs if doc is not None), docs
+    docs = [doc for doc in record('spacy_parse', 'tokens', parse) if doc is not None]
+    tokens = sum(len(doc) for doc in docs)
+
+    def entities_and_phrases():
+        entities = {}
+        for doc in docs:
+            for entity_type, values in generator.extract_entities(doc).items():
+                entities.setdefault(entity_type, []).extend(values)
+            generator.extract_key_phrases_with_pos(doc)
+        return tokens, entities
+    entity_types = record('entity_phrase_extraction', 'tokens', entities_and_phrases)
+
+    def candidates():
+        found = [candidate for doc in docs for candidate in generator.find_candidate_questions(doc, entity_types)]
+        return len(found), found
+    record('candidate_building', 'candidates', candidates)
+
+    # Later stages start from the analysis the server would cache
+    analysis = generator._analyze_docs(iter(docs), len(docs))
+
+    def distractors():
+        rng = random.Random(seed)
+        index = DistractorIndex(analysis.entities, analysis.key_phrases, analysis.key_phrase_pos,
+                                generator._vectors_model())
+        for candidate in analysis.candidates:
+            index.distractors(candidate.answer, candidate.type, 3, rng)
+        return len(analysis.candidates), None
+    record('distractor_generation', 'candidates', distractors)
+
+    def assembly():
+        # A fresh analysis each run, so the distractor index is rebuilt as on a cache load
+        fresh = DocumentAnalysis(entities=analysis.entities, key_phrases=analysis.key_phrases,
+                                 candidates=analysis.candidates, key_phrase_pos=analysis.key_phrase_pos,
+                                 candidate_counts=analysis.candidate_counts)
+        mcqs = generator.generate_mcqs_from_analysis(fresh, num_questions, random.Random(seed))
+        return len(mcqs), None
+    record('assembly', 'questions', assembly)
+
+    return results
+
+
+def print_results(results: List[Dict[str, Any]], baseline: Dict[Tuple[str, str], Dict[str, Any]]) -> None:
+    header = f"{'corpus':<16} {'stage':<26} {'p50 (ms)':>10} {'p95 (ms)':>10} {'throughput':>22} {'peak MB':>8}"
+    if baseline:
+        header += f" {'p50 vs base':>12}"
+    print(header)
+    for result in results:
+        throughput = f"{result['throughput']:,.0f} {result['unit']}/s" if result['throughput'] else '-'
+        line = (f"{result['corpus']:<16} {result['stage']:<26} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} "
+                f"{throughput:>22} {result['peak_memory_mb']:>8.2f}")
+        base = baseline.get((result['corpus'], result['stage']))
+        if base and base['p50_ms']:
+            line += f" {result['p50_ms'] / base['p50_ms']:>11.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpora', nargs='+', default=['gettysburg', 'gettysburg:50', 'synthetic:10', 'synthetic:100'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--num-questions', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the results as JSON")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare p50 latencies against")
+    args = parser.parse_args()
+
+    require_nlp()
+    from mcq_generator import generator
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(result['corpus'], result['stage']): result for result in json.load(f)['results']}
+
+    results = []
+    for spec in args.corpora:
+        results.extend(benchmark_corpus(spec, args.repeat, args.num_questions, args.seed))
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'spacy': spacy.__version__,
+                'settings': generator.settings(),
+                'repeat': args.repeat,
+                'num_questions': args.num_questions,
+                'seed': args.seed,
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(slots=True)
+class Candidate:
+    """A sentence and an entity in it that a question can ask about"""
+    sentence: str
+    answer: str
+    type: str
+    # Character span of the answer within the sentence
+    answer_start: Optional[int] = None
+    answer_end: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Candidate':
+        return cls(data['sentence'], data['answer'], data['type'], data.get('answer_start'), data.get('answer_end'))
+
+
+class CandidatePool:
+    """Uniform sample of at most capacity candidates per answer type (reservoir sampling, Algorithm R)
+
+    Each mention is offered before its record is built, so mentions that do
+    not win a slot cost nothing and memory stays flat however long the
+    document is. Every mention of a type has the same chance of being kept,
+    so each part of the document is represented in proportion to its share
+    of the mentions, whatever order the chunks arrive in.
+    """
+
+    def __init__(self, capacity: int, rng: Optional[random.Random] = None):
+        self.capacity = capacity
+        self.rng = rng or random.Random(0)
+        self.reservoirs: Dict[str, List[Candidate]] = {}
+        # Mentions offered per type, kept or not
+        self.seen: Dict[str, int] = {}
+
+    def offer(self, answer_type: str) -> Optional[int]:
+        """Count a mention and return the slot its candidate must be put in, or None to drop it"""
+        seen = self.seen.get(answer_type, 0) + 1
+        self.seen[answer_type] = seen
+        if seen <= self.capacity:
+            return seen - 1
+        slot = self.rng.randrange(seen)
+        return slot if slot < self.capacity else None
+
+    def put(self, slot: int, candidate: Candidate) -> None:
+        """Store the candidate of a mention in the slot offer() returned for it"""
+        reservoir = self.reservoirs.setdefault(candidate.type, [])
+        if slot == len(reservoir):
+            reservoir.append(candidate)
+        else:
+            reservoir[slot] = candidate
+
+
+def merge_samples(first: List[Candidate], first_seen: int, second: List[Candidate], second_seen: int,
+                  capacity: int, rng: random.Random) -> List[Candidate]:
+    """Combine uniform samples of two mention streams into a uniform sample of both, of at most capacity"""
+    if len(first) + len(second) <= capacity:
+        return first + second
+    # How many of the combined sample come from each stream follows the hypergeometric
+    # distribution over the mentions seen; any subset of a uniform sample is uniform too
+    from_first = 0
+    remaining_first, remaining_second = first_seen, second_seen
+    for _ in range(capacity):
+        if rng.randrange(remaining_first + remaining_second) < remaining_first:
+            from_first += 1
+            remaining_first -= 1
+        else:
+            remaining_second -= 1
+    return rng.sample(first, from_first) + rng.sample(second, capacity - from_first)
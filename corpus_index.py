@@ -0,0 +1,84 @@
+import logging
+import time
+from typing import Dict, Iterable, List
+
+from sqlite_db import connect, create_schema
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    course TEXT NOT NULL,
+    document TEXT NOT NULL,
+    added REAL NOT NULL,
+    PRIMARY KEY (course, document)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entities (
+    course TEXT NOT NULL,
+    type TEXT NOT NULL,
+    text TEXT NOT NULL,
+    documents INTEGER NOT NULL,
+    PRIMARY KEY (course, type, text)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entities_by_frequency ON entities (course, type, documents DESC, text);
+'''
+
+# Entities of each type read back per lookup, the most widespread in the course first
+ENTITIES_PER_TYPE = 200
+
+
+class CorpusIndex:
+    """Entities of the documents analyzed for each course, kept in SQLite for cross-document distractors
+
+    Each entity is stored once per course and type with the number of the
+    course's documents that mention it, so lookups return the entities most
+    common across the course first, straight from an index. A document is
+    counted once per course however often it is uploaded. Like the job queue,
+    the file is shared by all gunicorn workers.
+    """
+
+    def __init__(self, db_path: str, entities_per_type: int = ENTITIES_PER_TYPE):
+        self.db_path = db_path
+        self.entities_per_type = entities_per_type
+        create_schema(db_path, SCHEMA)
+
+    def add_document(self, course: str, document_id: str, entities: Dict[str, List[str]]) -> bool:
+        """Add a document's distinct entities (type -> texts) to a course; False if it was already there"""
+        with connect(self.db_path) as conn:
+            added = conn.execute(
+                "INSERT OR IGNORE INTO documents (course, document, added) VALUES (?, ?, ?)",
+                (course, document_id, time.time())
+            ).rowcount
+            if not added:
+                return False
+            conn.executemany(
+                "INSERT INTO entities (course, type, text, documents) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (course, type, text) DO UPDATE SET documents = documents + 1",
+                ((course, entity_type, text)
+                 for entity_type, texts in entities.items() for text in dict.fromkeys(texts))
+            )
+        logger.info(f"Added document {document_id[:12]} to course '{course}' "
+                    f"({sum(len(texts) for texts in entities.values())} entities)")
+        return True
+
+    def entities(self, course: str, entity_types: Iterable[str]) -> Dict[str, List[str]]:
+        """The course's most widespread entities of each type, most documents first"""
+        corpus = {}
+        with connect(self.db_path) as conn:
+            for entity_type in entity_types:
+                rows = conn.execute(
+                    "SELECT text FROM entities WHERE course = ? AND type = ? ORDER BY documents DESC, text LIMIT ?",
+                    (course, entity_type, self.entities_per_type)
+                ).fetchall()
+                if rows:
+                    corpus[entity_type] = [text for text, in rows]
+        return corpus
+
+    def other_documents(self, course: str, document_id: str) -> int:
+        """Documents of the course other than document_id"""
+        with connect(self.db_path) as conn:
+            count, = conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE course = ? AND document != ?", (course, document_id)
+            ).fetchone()
+        return count
@@ -0,0 +1,174 @@
+import random
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Fallback wrong answers when a document has too few entities of a type
+GENERIC_DISTRACTORS = {
+    'PERSON': ['Albert Einstein', 'Marie Curie', 'Isaac Newton', 'Charles Darwin', 'Leonardo da Vinci'],
+    'ORG': ['Harvard University', 'Stanford University', 'MIT', 'Oxford University', 'Cambridge University'],
+    'GPE': ['United States', 'United Kingdom', 'Germany', 'France', 'Japan', 'China', 'India'],
+    'DATE': ['1990', '2000', '2010', '1985', '1995', '2005', '2015'],
+    'MONEY': ['$1,000', '$5,000', '$10,000', '$500', '$2,000'],
+    'PERCENT': ['25%', '50%', '75%', '10%', '30%', '60%', '90%'],
+    'CARDINAL': ['100', '500', '1000', '50', '200', '300', '750'],
+    'EVENT': ['World War II', 'Industrial Revolution', 'Renaissance', 'Cold War'],
+    'PRODUCT': ['iPhone', 'Windows', 'Android', 'MacBook'],
+    'WORK_OF_ART': ['Mona Lisa', 'The Starry Night', 'The Scream', 'Guernica'],
+}
+
+# Key phrases longer than this make poor options
+MAX_PHRASE_WORDS = 3
+
+# Part-of-speech tags recorded for key phrases; noun chunks are tagged CHUNK
+NOUN_LIKE_POS = ('CHUNK', 'PROPN', 'NOUN')
+
+# Similarity ranking picks from this many times k of the closest options, so regenerated exams vary
+RANK_POOL_FACTOR = 2
+
+
+def has_vectors(model) -> bool:
+    """Whether a spaCy model ships static word vectors (the _sm models do not)"""
+    return model is not None and model.vocab.vectors.shape[0] > 0 and model.vocab.vectors.shape[1] > 0
+
+
+class PhraseVectors:
+    """Unit-length phrase vectors from a spaCy model's static vectors, computed once per phrase
+
+    Only the tokenizer runs (model.make_doc), so this costs a vector lookup per
+    token rather than a pipeline pass. Phrases with no known words get a zero
+    vector and therefore a similarity of 0 to everything.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._cache = {}
+
+    def vector(self, text: str) -> np.ndarray:
+        vector = self._cache.get(text)
+        if vector is None:
+            vector = np.asarray(self.model.make_doc(text).vector, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector = vector / norm
+            self._cache[text] = vector
+        return vector
+
+    def matrix(self, texts: List[str]) -> np.ndarray:
+        """Stack the vectors of texts into an (n, width) matrix"""
+        width = self.model.vocab.vectors.shape[1]
+        if not texts:
+            return np.zeros((0, width), dtype=np.float32)
+        return np.vstack([self.vector(text) for text in texts])
+
+
+class _Pool:
+    """A list of options plus case-folded counts, for sampling with exclusions"""
+
+    def __init__(self, options: List[str], vectors: Optional[PhraseVectors] = None):
+        self.options = options
+        self.folds = Counter(option.lower() for option in options)
+        self.vectors = vectors
+        # Built on the first ranked lookup; most pools of a document are never ranked
+        self._matrix = None
+
+    def sample(self, k: int, excluded_fold: str, excluded: List[str], rng,
+               query: Optional[np.ndarray] = None) -> List[str]:
+        """Up to k options that are neither excluded_fold (case-insensitive) nor in excluded
+
+        Draws just enough extra options to cover the ones that may be rejected,
+        so the cost depends on k and the exclusions rather than the pool size.
+        With a query vector the draw is taken from the options closest to it.
+        """
+        if k <= 0 or not self.options:
+            return []
+        blocked = self.folds[excluded_fold] + sum(1 for option in excluded if option.lower() in self.folds)
+        if query is not None and self.vectors is not None:
+            draw = self._closest(query, (k + blocked) * RANK_POOL_FACTOR)
+        else:
+            draw = rng.sample(self.options, min(len(self.options), k + blocked))
+        excluded_set = set(excluded)
+        allowed = [option for option in draw if option.lower() != excluded_fold and option not in excluded_set]
+        if query is not None and self.vectors is not None:
+            return rng.sample(allowed[:k * RANK_POOL_FACTOR], min(k, len(allowed)))
+        return allowed[:k]
+
+    def _closest(self, query: np.ndarray, n: int) -> List[str]:
+        """The n options most cosine-similar to a unit query vector, closest first"""
+        if self._matrix is None:
+            self._matrix = self.vectors.matrix(self.options)
+        scores = self._matrix @ query
+        if n < len(scores):
+            top = np.argpartition(-scores, n - 1)[:n]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [self.options[i] for i in top]
+
+
+class DistractorIndex:
+    """Distractor candidates of one document, bucketed once for near-constant-time lookups
+
+    Entities are bucketed by type and key phrases by (word count, part of speech),
+    each with case-folded counts so that the correct answer can be excluded
+    without scanning the bucket.
+
+    Given a spaCy model with word vectors, options are drawn from those most
+    similar to the correct answer instead of uniformly at random.
+
+    corpus_entities, entities by type from other documents of the same course,
+    are used when the document has too few entities of the answer's type.
+    """
+
+    def __init__(self, entities: Dict[str, List[str]], key_phrases: List[str],
+                 key_phrase_pos: Optional[Dict[str, str]] = None, vectors_model=None,
+                 corpus_entities: Optional[Dict[str, List[str]]] = None):
+        key_phrase_pos = key_phrase_pos or {}
+        self.vectors_model = vectors_model
+        self.corpus_entities = corpus_entities
+        self.vectors = PhraseVectors(vectors_model) if has_vectors(vectors_model) else None
+        vectors = self.vectors
+        self.entities = {entity_type: _Pool(list(options), vectors)
+                         for entity_type, options in entities.items() if options}
+        self.corpus = {entity_type: _Pool(list(options), vectors)
+                       for entity_type, options in (corpus_entities or {}).items() if options}
+
+        self.phrase_buckets = {}
+        for phrase in key_phrases:
+            word_count = len(phrase.split())
+            # Phrases without a recorded tag come from older analyses; treat them as nouns
+            pos = key_phrase_pos.get(phrase, 'NOUN')
+            self.phrase_buckets.setdefault((word_count, pos), []).append(phrase)
+
+        # Noun-like phrases are preferred over verbs as stand-ins for entity answers
+        short = [(words, pos) for words, pos in self.phrase_buckets if words <= MAX_PHRASE_WORDS]
+        self.noun_phrases = _Pool([phrase for bucket in short if bucket[1] in NOUN_LIKE_POS
+                                   for phrase in self.phrase_buckets[bucket]], vectors)
+        self.other_phrases = _Pool([phrase for bucket in short if bucket[1] not in NOUN_LIKE_POS
+                                    for phrase in self.phrase_buckets[bucket]], vectors)
+        self.generic = {entity_type: _Pool(options, vectors) for entity_type, options in GENERIC_DISTRACTORS.items()}
+
+    def distractors(self, correct_answer: str, answer_type: str, k: int = 3,
+                    rng: Optional[random.Random] = None) -> List[str]:
+        """k wrong answers for a question of answer_type, excluding the correct answer"""
+        rng = rng or random.Random()
+        answer_fold = correct_answer.lower()
+        distractors = []
+        query = None
+        if self.vectors is not None:
+            query = self.vectors.vector(correct_answer)
+            # An answer with no known words cannot be ranked against
+            if not query.any():
+                query = None
+
+        # Entities of the same type from the document, then from its course, then key phrases,
+        # then the generic table
+        for pool in (self.entities.get(answer_type), self.corpus.get(answer_type), self.noun_phrases,
+                     self.other_phrases, self.generic.get(answer_type)):
+            if len(distractors) >= k:
+                break
+            if pool is not None:
+                distractors.extend(pool.sample(k - len(distractors), answer_fold, distractors, rng, query))
+
+        return distractors[:k]
@@ -0,0 +1,76 @@
+import hashlib
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import spacy
+from spacy.tokens import Doc, DocBin
+
+from result_cache import DiskBackend, ResultCache, make_cache_key
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Token annotations the generator reads back: entities, POS, the parse (noun chunks) and sentence starts
+DOC_ATTRS = ['POS', 'HEAD', 'DEP', 'ENT_IOB', 'ENT_TYPE', 'SENT_START']
+
+
+class DocBinBackend(DiskBackend):
+    """DocBin bytes in a directory, evicted least recently used first once past max_bytes"""
+    suffix = '.spacy'
+
+    def _read(self, path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _write(self, fd: int, value: bytes) -> None:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(value)
+
+
+class DocCache(ResultCache):
+    """Parsed chunks as DocBin bytes on disk, keyed by the chunk text and the model that parsed it
+
+    Loading a Doc back only restores its annotations into the model's vocab,
+    so an identical text skips every pipeline component. Entries are shared by
+    all gunicorn workers.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        super().__init__(DocBinBackend(directory, max_bytes))
+
+    @staticmethod
+    def key(text: str, model_settings: Dict[str, Any]) -> str:
+        """Cache key of a chunk parsed by the model described by model_settings"""
+        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return make_cache_key(text_hash, {**model_settings, 'spacy': spacy.__version__, 'attrs': DOC_ATTRS})
+
+    def lookup(self, key: str) -> bool:
+        """Whether a chunk is cached; a missing one counts as a miss, a present one when it is loaded"""
+        if key in self:
+            return True
+        with self._lock:
+            self.misses += 1
+        return False
+
+    def load(self, key: str, vocab) -> Optional[Doc]:
+        """The cached Doc under key, or None"""
+        data = self.get(key)
+        if data is None:
+            return None
+        try:
+            return next(DocBin().from_bytes(data).get_docs(vocab))
+        except Exception as e:
+            logger.warning(f"Discarding unreadable parsed document {key}: {str(e)}")
+            return None
+
+    def store(self, key: str, doc: Doc) -> None:
+        self.set(key, DocBin(attrs=DOC_ATTRS, docs=[doc]).to_bytes())
+
+
+def create_doc_cache_from_env() -> Optional[DocCache]:
+    """A DocCache in MCQ_DOC_CACHE_DIR, or None (no caching of parsed documents) when it is unset"""
+    cache_dir = os.environ.get('MCQ_DOC_CACHE_DIR')
+    if not cache_dir:
+        return None
+    return DocCache(cache_dir, int(os.environ.get('MCQ_DOC_CACHE_MAX_BYTES', 1024 * 1024 * 1024)))
@@ -0,0 +1,127 @@
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from spacy.strings import StringStore, get_string_id
+
+# Store key of the key phrases, kept apart from the entity types
+PHRASES = '#phrases'
+
+
+class _Column:
+    """Distinct string hashes of one kind in first-seen order, with mention counts and optional tags"""
+    __slots__ = ('hashes', 'counts', 'tags', 'sorted_hashes', 'sorter')
+
+    def __init__(self, hashes: np.ndarray, counts: np.ndarray, tags: Optional[np.ndarray]):
+        self.hashes = hashes
+        self.counts = counts
+        self.tags = tags
+        # The hashes in sorted order and where each sits in first-seen order, for binary-search lookups
+        self.sorter = np.argsort(hashes, kind='stable')
+        self.sorted_hashes = hashes[self.sorter]
+
+    def merge(self, hashes: np.ndarray, counts: np.ndarray, tags: Optional[np.ndarray]) -> np.ndarray:
+        """Add distinct hashes in first-seen order; returns a mask of the ones not seen before"""
+        positions = np.searchsorted(self.sorted_hashes, hashes)
+        clipped = np.minimum(positions, len(self.sorted_hashes) - 1)
+        found = self.sorted_hashes[clipped] == hashes
+        self.counts[self.sorter[clipped[found]]] += counts[found]
+        new = ~found
+        if new.any():
+            added = np.arange(len(self.hashes), len(self.hashes) + int(new.sum()))
+            # Inserted in hash order so that new hashes landing at the same position stay sorted
+            order = np.argsort(hashes[new], kind='stable')
+            self.sorted_hashes = np.insert(self.sorted_hashes, positions[new][order], hashes[new][order])
+            self.sorter = np.insert(self.sorter, positions[new][order], added[order])
+            self.hashes = np.concatenate([self.hashes, hashes[new]])
+            self.counts = np.concatenate([self.counts, counts[new]])
+            if self.tags is not None:
+                self.tags = np.concatenate([self.tags, tags[new]])
+        return new
+
+
+class EntityStore:
+    """Distinct entities per type and key phrases of a document, held as string hashes
+
+    Each distinct string is interned once in the store's own StringStore (the
+    model's shared vocab is left alone, so it does not grow with every upload).
+    Per type the store keeps a NumPy array of hashes in first-seen order and
+    how many times each was mentioned; key phrases also keep the tag they were
+    first seen with. Chunk results are merged in as they arrive, so no Python
+    string or list is kept per mention, and strings are only built again when
+    the store is materialized into an analysis.
+
+    With keep_strings=False nothing is interned: the store only tells which
+    strings are new, for callers that keep the strings themselves.
+    """
+
+    def __init__(self, keep_strings: bool = True):
+        self.strings = StringStore() if keep_strings else None
+        self._columns: Dict[str, _Column] = {}
+        self._tag_names: List[str] = []
+        self._tag_codes: Dict[str, int] = {}
+
+    def add(self, key: str, texts: Sequence[str], tags: Optional[Sequence[str]] = None) -> List[str]:
+        """Count mentions of texts under key (an entity type or PHRASES); returns the texts not seen before
+
+        tags, if given, is parallel to texts; a text keeps the tag it was first seen with.
+        """
+        # Counter keeps first-seen order; only the chunk's distinct strings are interned
+        mention_counts = Counter(texts)
+        if not mention_counts:
+            return []
+        distinct = list(mention_counts)
+        intern = self.strings.add if self.strings is not None else get_string_id
+        hashes = np.fromiter(map(intern, distinct), dtype=np.uint64, count=len(distinct))
+        counts = np.fromiter(mention_counts.values(), dtype=np.int64, count=len(distinct))
+        tag_codes = None
+        if tags is not None:
+            first_tags = {}
+            for text, tag in zip(texts, tags):
+                first_tags.setdefault(text, tag)
+            tag_codes = np.fromiter((self._tag_code(first_tags[text]) for text in distinct), dtype=np.uint8,
+                                    count=len(distinct))
+
+        column = self._columns.get(key)
+        if column is None:
+            self._columns[key] = _Column(hashes, counts, tag_codes)
+            return distinct
+        new = column.merge(hashes, counts, tag_codes)
+        return [distinct[i] for i in np.flatnonzero(new).tolist()]
+
+    def _tag_code(self, tag: str) -> int:
+        code = self._tag_codes.get(tag)
+        if code is None:
+            code = self._tag_codes[tag] = len(self._tag_names)
+            self._tag_names.append(tag)
+        return code
+
+    def entity_types(self) -> List[str]:
+        """Entity types with at least one mention, in first-seen order"""
+        return [key for key in self._columns if key != PHRASES]
+
+    def distinct(self, key: str) -> int:
+        """Distinct strings stored under key"""
+        column = self._columns.get(key)
+        return len(column.hashes) if column is not None else 0
+
+    def mentions(self, key: str) -> int:
+        """Mentions counted under key, repeats included"""
+        column = self._columns.get(key)
+        return int(column.counts.sum()) if column is not None else 0
+
+    def texts(self, key: str) -> List[str]:
+        """The distinct strings stored under key, in first-seen order (needs keep_strings)"""
+        column = self._columns.get(key)
+        if column is None:
+            return []
+        strings = self.strings
+        return [strings[h] for h in column.hashes.tolist()]
+
+    def tags(self, key: str) -> Dict[str, str]:
+        """Each string stored under key with the tag it was first seen with"""
+        column = self._columns.get(key)
+        if column is None or column.tags is None:
+            return {}
+        names = self._tag_names
+        return {text: names[code] for text, code in zip(self.texts(key), column.tags.tolist())}
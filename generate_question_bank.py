@@ -0,0 +1,179 @@
+"""Generate question banks for a directory of PDFs and text files
+
+Every document under INPUT_DIR gets OUTPUT_DIR/<relative path>.jsonl with one
+MCQ per line, produced by the same analysis and question assembly as the
+server. Documents are processed in a pool of worker processes and each one
+finished is appended to OUTPUT_DIR/checkpoint.jsonl, so an interrupted run
+picks up where it stopped; unchanged documents are skipped.
+
+Usage: python generate_question_bank.py INPUT_DIR OUTPUT_DIR [--num-questions 20] [--workers 4] [--seed 0]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, Optional
+
+from mcq_generator import analyze_text, is_spacy_available, sample_questions
+from pdf_extraction import default_processes, extract_pdf_text
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DOCUMENT_SUFFIXES = ('.pdf', '.txt')
+CHECKPOINT_FILE = 'checkpoint.jsonl'
+
+
+def find_documents(input_dir: str) -> Iterator[str]:
+    """Paths of the PDFs and text files under input_dir, relative to it, in a stable order"""
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(DOCUMENT_SUFFIXES):
+                yield os.path.relpath(os.path.join(root, name), input_dir)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_checkpoint(output_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Latest successful checkpoint entry per document"""
+    done = {}
+    try:
+        with open(os.path.join(output_dir, CHECKPOINT_FILE)) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by an interrupted run
+                    continue
+                if not entry.get('error'):
+                    done[entry['document']] = entry
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def append_checkpoint(output_dir: str, entry: Dict[str, Any]) -> None:
+    with open(os.path.join(output_dir, CHECKPOINT_FILE), 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_jsonl(path: str, records) -> None:
+    """Write records atomically so a killed worker never leaves a partial bank"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def process_document(input_dir: str, output_dir: str, document: str, sha256: str,
+                     num_questions: int, seed: Optional[int]) -> Dict[str, Any]:
+    """Worker entry point: extract, analyze and write one document's question bank"""
+    start = time.perf_counter()
+    entry = {'document': document, 'sha256': sha256, 'num_questions': num_questions, 'seed': seed,
+             'pages': 0, 'questions': 0, 'output': document + '.jsonl', 'error': None}
+    path = os.path.join(input_dir, document)
+    try:
+        if document.lower().endswith('.pdf'):
+            # One process per document already; no nested extraction pool
+            extraction = extract_pdf_text(path, processes=1)
+            text = extraction.text
+            entry['pages'] = extraction.pages_processed
+        else:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                text = f.read()
+            # Form feeds separate pages in text dumps of printed documents
+            entry['pages'] = text.count('\f') + 1 if text.strip() else 0
+
+        analysis = analyze_text(text)
+        if analysis is None:
+            raise ValueError('no text to analyze')
+        # Seeded per document so a rerun with the same --seed yields the same bank
+        document_seed = None if seed is None else seed ^ int(sha256[:8], 16)
+        mcqs = sample_questions(analysis, num_questions, document_seed)
+        write_jsonl(os.path.join(output_dir, entry['output']),
+                    ({'document': document, 'index': index, **mcq} for index, mcq in enumerate(mcqs)))
+        entry['questions'] = len(mcqs)
+    except Exception as e:
+        entry['error'] = str(e)
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input_dir')
+    parser.add_argument('output_dir')
+    parser.add_argument('--num-questions', type=int, default=20, help="Questions per document (default: 20)")
+    parser.add_argument('--workers', type=int, default=default_processes(),
+                        help="Worker processes (default: MCQ_PDF_PROCESSES or the CPU count, max 4)")
+    parser.add_argument('--seed', type=int, help="Make the generated banks reproducible")
+    parser.add_argument('--force', action='store_true', help="Regenerate documents already in the checkpoint")
+    args = parser.parse_args()
+
+    if not is_spacy_available():
+        raise SystemExit("spaCy English model not found. Please install it with: python -m spacy download en_core_web_sm")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    done = {} if args.force else load_checkpoint(args.output_dir)
+    pending = []
+    skipped = 0
+    for document in find_documents(args.input_dir):
+        sha256 = file_sha256(os.path.join(args.input_dir, document))
+        previous = done.get(document)
+        if (previous and previous['sha256'] == sha256 and previous['num_questions'] == args.num_questions
+                and previous['seed'] == args.seed):
+            skipped += 1
+            continue
+        pending.append((document, sha256))
+    logger.info(f"{len(pending)} documents to process, {skipped} already done")
+
+    # Forked workers share the spaCy model the parent already loaded
+    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    start = time.perf_counter()
+    pages = questions = failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), mp_context=context) as pool:
+        futures = [
+            pool.submit(process_document, args.input_dir, args.output_dir, document, sha256,
+                        args.num_questions, args.seed)
+            for document, sha256 in pending
+        ]
+        for finished, future in enumerate(as_completed(futures), 1):
+            entry = future.result()
+            append_checkpoint(args.output_dir, entry)
+            if entry['error']:
+                failed += 1
+                logger.error(f"[{finished}/{len(pending)}] {entry['document']}: {entry['error']}")
+                continue
+            pages += entry['pages']
+            questions += entry['questions']
+            logger.info(f"[{finished}/{len(pending)}] {entry['document']}: {entry['questions']} questions "
+                        f"from {entry['pages']} pages in {entry['seconds']:.1f}s")
+
+    elapsed = time.perf_counter() - start
+    print(f"Processed {len(pending) - failed} documents ({failed} failed, {skipped} skipped) in {elapsed:.1f}s")
+    if elapsed > 0:
+        print(f"Throughput: {pages / elapsed:.2f} pages/sec, {questions / elapsed:.2f} questions/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import gc
+import os
+
+# Gunicorn binds to $PORT when it is set (Render, Heroku)
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Load the app (and the spaCy model) once in the master and fork workers from it,
+# so the model's memory is shared copy-on-write instead of loaded per worker
+preload_app = os.environ.get('MCQ_PRELOAD', '1') != '0'
+
+
+def when_ready(server):
+    """Warm the preloaded model up in the master, right before workers are forked"""
+    if not preload_app:
+        return
+    from mcq_generator import warm_up
+    warm_up()
+    # Keep the garbage collector from touching (and so copying) the preloaded objects
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """Without preloading every worker loads its own model; warm it before serving"""
+    if preload_app:
+        return
+    from mcq_generator import warm_up
+    warm_up()
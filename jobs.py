@@ -0,0 +1,166 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from sqlite_db import connect, create_schema
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    progress TEXT NOT NULL,
+    result TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+)
+'''
+
+# Result of a job whose worker process stopped (timeout, restart, deploy) before it finished
+LOST_RESULT = {
+    'success': False,
+    'error': 'Job lost',
+    'message': 'The worker processing this job stopped before it finished. Please submit the PDF again.',
+    'status_code': 500
+}
+
+
+class JobQueue:
+    """Background worker pool with job state persisted in SQLite
+
+    Jobs run on a thread pool inside the worker process that accepted them,
+    while status and results are written to a SQLite file so that polls
+    handled by any gunicorn worker see the same state.
+
+    That process touches the updated time of its unfinished jobs every
+    stale_seconds / 4. A queued or running job not touched for stale_seconds
+    lost its worker and is marked failed on the next get or cleanup.
+    """
+
+    def __init__(self, db_path: str, max_workers: int = 2, ttl_seconds: int = 3600, stale_seconds: int = 120):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        # Created on first submit so no threads exist before gunicorn forks
+        self._executor = None
+        self._lock = threading.Lock()
+        # Jobs queued or running in this process, kept alive by the heartbeat thread
+        self._pending = set()
+        create_schema(db_path, SCHEMA)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='mcq-job')
+                threading.Thread(target=self._heartbeat, name='mcq-job-heartbeat', daemon=True).start()
+            return self._executor
+
+    def _heartbeat(self) -> None:
+        """Touch the unfinished jobs of this process so that other workers can tell it is alive"""
+        while True:
+            time.sleep(self.stale_seconds / 4)
+            with self._lock:
+                job_ids = list(self._pending)
+            if not job_ids:
+                continue
+            now = time.time()
+            try:
+                with connect(self.db_path) as conn:
+                    conn.executemany(
+                        "UPDATE jobs SET updated = ? WHERE id = ? AND status IN ('queued', 'running')",
+                        ((now, job_id) for job_id in job_ids)
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Job heartbeat failed: {str(e)}")
+
+    def _update(self, job_id: str, **fields) -> None:
+        fields['updated'] = time.time()
+        columns = ', '.join(f"{name} = ?" for name in fields)
+        with connect(self.db_path) as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", [*fields.values(), job_id])
+
+    def submit(self, func: Callable[..., Dict[str, Any]], *args) -> str:
+        """Queue func(*args, progress) and return the job id
+
+        func receives a progress(**fields) callback as its last argument and
+        returns a JSON-serializable result; a result with success=False marks
+        the job as failed.
+        """
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, progress, created, updated) VALUES (?, 'queued', '{}', ?, ?)",
+                (job_id, now, now)
+            )
+        with self._lock:
+            self._pending.add(job_id)
+        self._get_executor().submit(self._run, job_id, func, args)
+        return job_id
+
+    def _run(self, job_id: str, func: Callable[..., Dict[str, Any]], args) -> None:
+        progress_state = {}
+
+        def progress(**fields):
+            progress_state.update(fields)
+            self._update(job_id, progress=json.dumps(progress_state))
+
+        self._update(job_id, status='running')
+        try:
+            result = func(*args, progress)
+            status = 'completed' if result.get('success') else 'failed'
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            result = {'success': False, 'error': 'Processing error', 'message': str(e)}
+            status = 'failed'
+        self._update(job_id, status=status, result=json.dumps(result))
+        with self._lock:
+            self._pending.discard(job_id)
+
+    def _fail_lost_jobs(self, conn: sqlite3.Connection) -> None:
+        """Mark queued or running jobs whose worker stopped sending heartbeats as failed"""
+        now = time.time()
+        lost = conn.execute(
+            "UPDATE jobs SET status = 'failed', result = ?, updated = ? "
+            "WHERE status IN ('queued', 'running') AND updated < ?",
+            (json.dumps(LOST_RESULT), now, now - self.stale_seconds)
+        ).rowcount
+        if lost:
+            logger.warning(f"Marked {lost} job(s) as failed after their worker stopped")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job's status, progress and result, or None if unknown"""
+        with connect(self.db_path) as conn:
+            self._fail_lost_jobs(conn)
+            row = conn.execute(
+                "SELECT status, progress, result, created, updated FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        status, progress, result, created, updated = row
+        return {
+            'job_id': job_id,
+            'status': status,
+            'progress': json.loads(progress),
+            'result': json.loads(result) if result else None,
+            'elapsed': round(updated - created, 3)
+        }
+
+    def cleanup(self) -> None:
+        """Fail jobs that lost their worker and forget jobs that finished more than ttl_seconds ago"""
+        with connect(self.db_path) as conn:
+            self._fail_lost_jobs(conn)
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated < ?",
+                (time.time() - self.ttl_seconds,)
+            )
@@ -1,151 +1,442 @@
 import spacy
+import os
 import random
-import re
+import time
 from collections import Counter
-from typing import List, Dict, Any
+from itertools import islice
+from dataclasses import dataclass, asdict, field
+from typing import List, Dict, Any, Iterator, Iterable, Optional, Callable, Tuple
+from candidate_pool import Candidate, CandidatePool, merge_samples
+from distractors import DistractorIndex, has_vectors
+from doc_cache import DocCache, create_doc_cache_from_env
+from entity_store import PHRASES, EntityStore
+from metrics import (CACHE_LOOKUPS, CANDIDATES_FOUND, CHUNKS_PARSED, QUESTIONS_GENERATED, QUESTIONS_REJECTED, record_stage,
+                     timed, timed_iter)
+from text_normalization import PARAGRAPH_BREAK, blank_out, clean_text, is_clean_entity
+import numpy as np
+from spacy.attrs import POS, IS_STOP, IS_ALPHA, LENGTH, LOWER, ORTH
+from spacy.parts_of_speech import IDS as POS_IDS, NAMES as POS_NAMES
+from spacy.strings import get_string_id
 import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = os.environ.get('MCQ_SPACY_MODEL', 'en_core_web_sm')
+
+# Components left out of the pipeline for each generation profile. The generator
+# reads NER labels, POS tags, is_stop, noun chunks and sentence boundaries only.
+GENERATION_PROFILES = {
+    'full': {'exclude': [], 'enable': []},
+    'default': {'exclude': ['lemmatizer'], 'enable': []},
+    # No noun chunks: the senter replaces the parser for sentence boundaries
+    'fast': {'exclude': ['lemmatizer', 'parser'], 'enable': ['senter']},
+}
+
+GENERATION_PROFILE = os.environ.get('MCQ_SPACY_PROFILE', 'default')
+
+
+def load_nlp(model_name: str = MODEL_NAME, profile: str = GENERATION_PROFILE):
+    """Load the spaCy model with the components of the given generation profile"""
+    if profile not in GENERATION_PROFILES:
+        raise ValueError(f"Unknown generation profile '{profile}', expected one of: {', '.join(GENERATION_PROFILES)}")
+    
+    settings = GENERATION_PROFILES[profile]
+    model = spacy.load(model_name, exclude=settings['exclude'])
+    for name in settings['enable']:
+        if name in model.disabled:
+            model.enable_pipe(name)
+    return model
+
+
 # Load spaCy model
 try:
-    nlp = spacy.load("en_core_web_sm")
-    logger.info("spaCy model loaded successfully")
+    nlp = load_nlp()
+    logger.info(f"spaCy model loaded successfully ({MODEL_NAME}, profile '{GENERATION_PROFILE}': {', '.join(nlp.pipe_names)})")
 except OSError:
     logger.error("spaCy English model not found. Please install it with: python -m spacy download en_core_web_sm")
     nlp = None
 
+# spaCy refuses texts longer than nlp.max_length (1,000,000 characters by default)
+MAX_CHUNK_SIZE = 1000000
+
+# Token attributes read by extract_key_phrases, in one doc.to_array call
+KEY_PHRASE_ATTRS = [POS, IS_STOP, IS_ALPHA, LENGTH, LOWER, ORTH]
+NOUN_POS = np.array([POS_IDS['NOUN'], POS_IDS['PROPN']], dtype=np.uint64)
+VERB_POS = POS_IDS['VERB']
+# Lowercase hashes of words that make poor key phrases
+NOUN_STOPLIST = np.array([get_string_id(word) for word in ['said', 'says', 'according', 'including']], dtype=np.uint64)
+VERB_STOPLIST = np.array([get_string_id(word) for word in ['is', 'are', 'was', 'were', 'have', 'has', 'had']],
+                         dtype=np.uint64)
+MAX_KEY_PHRASES = 100
+
+# Named entity labels collected as answers and distractors
+ENTITY_TYPES = ('PERSON', 'ORG', 'GPE', 'DATE', 'MONEY', 'PERCENT', 'CARDINAL', 'EVENT', 'PRODUCT', 'WORK_OF_ART',
+                'LAW', 'LANGUAGE')
+
+# Entity types whose questions come first, taking turns in this order; other types fill the remaining slots
+QUESTION_TYPE_PRIORITY = ['PERSON', 'ORG', 'GPE', 'DATE', 'EVENT', 'PRODUCT', 'MONEY', 'PERCENT']
+
+
+def _split_oversized(paragraph: str, max_chunk_size: int) -> Iterator[str]:
+    """Split a paragraph that does not fit in one chunk, preferring sentence ends"""
+    while len(paragraph) > max_chunk_size:
+        cut = paragraph.rfind('. ', 0, max_chunk_size)
+        if cut <= 0:
+            cut = paragraph.rfind(' ', 0, max_chunk_size)
+        if cut <= 0:
+            cut = max_chunk_size - 1
+        yield paragraph[:cut + 1].strip()
+        paragraph = paragraph[cut + 1:].strip()
+    if paragraph:
+        yield paragraph
+
+
+def random_order(items: List, rng) -> Iterator:
+    """Yield the items of a list in random order without copying or shuffling it
+
+    A sparse Fisher-Yates shuffle: only swapped positions are remembered, so
+    drawing k items costs O(k) however long the list is.
+    """
+    swapped = {}
+    for remaining in range(len(items), 0, -1):
+        i = rng.randrange(remaining)
+        yield items[swapped.get(i, i)]
+        # Move the last undrawn position into the drawn one
+        last = remaining - 1
+        swapped[i] = swapped.pop(last, last)
+
+
+def split_into_chunks(text: str, max_chunk_size: int = MAX_CHUNK_SIZE) -> List[str]:
+    """Split raw text into cleaned chunks on paragraph/page boundaries"""
+    chunks = []
+    current = []
+    current_size = 0
+    
+    for raw_paragraph in PARAGRAPH_BREAK.split(text):
+        paragraph = clean_text(raw_paragraph)
+        if not paragraph:
+            continue
+        
+        for piece in _split_oversized(paragraph, max_chunk_size):
+            # +1 for the space joining it to the previous paragraph
+            if current and current_size + 1 + len(piece) > max_chunk_size:
+                chunks.append(' '.join(current))
+                current = []
+                current_size = 0
+            current_size += len(piece) + (1 if current else 0)
+            current.append(piece)
+    
+    if current:
+        chunks.append(' '.join(current))
+    
+    return chunks
+
+
+@dataclass
+class DocumentAnalysis:
+    """NLP analysis of one document, reusable for any number of exams"""
+    entities: Dict[str, List[str]]
+    key_phrases: List[str]
+    # A bounded sample of the mentions when the analysis used a candidate pool
+    candidates: List[Candidate]
+    # Part of speech of each key phrase (CHUNK for noun chunks)
+    key_phrase_pos: Dict[str, str] = field(default_factory=dict)
+    # Mentions found per answer type, of which candidates is a uniform sample
+    candidate_counts: Dict[str, int] = field(default_factory=dict)
+
+    def distractor_index(self, vectors_model=None,
+                         corpus_entities: Optional[Dict[str, List[str]]] = None) -> DistractorIndex:
+        """Distractor lookups for this document, built on first use
+
+        vectors_model, a spaCy model with word vectors, ranks options by similarity.
+        corpus_entities (type -> texts) from other documents of the course back up
+        the document's own entities.
+        """
+        index = getattr(self, '_distractor_index', None)
+        if index is None or index.vectors_model is not vectors_model or index.corpus_entities is not corpus_entities:
+            with timed('distractor_index'):
+                index = DistractorIndex(self.entities, self.key_phrases, self.key_phrase_pos, vectors_model,
+                                        corpus_entities)
+            self._distractor_index = index
+        return index
+
+    def candidate_buckets(self) -> Dict[str, List[Candidate]]:
+        """Candidates grouped by answer type, built on first use"""
+        buckets = getattr(self, '_candidate_buckets', None)
+        if buckets is None:
+            buckets = {}
+            for candidate in self.candidates:
+                buckets.setdefault(candidate.type, []).append(candidate)
+            self._candidate_buckets = buckets
+        return buckets
+
+    def mentions(self, answer_type: str) -> int:
+        """Mentions of an answer type found in the document, sampled or not"""
+        return self.candidate_counts.get(answer_type, len(self.candidate_buckets().get(answer_type, [])))
+
+    def entity_store(self) -> EntityStore:
+        """Hashes of the entities and key phrases, built on first use and kept up to date by merge"""
+        store = getattr(self, '_entity_store', None)
+        if store is None:
+            # The strings themselves stay in entities and key_phrases
+            store = EntityStore(keep_strings=False)
+            for entity_type, entities in self.entities.items():
+                store.add(entity_type, entities)
+            store.add(PHRASES, self.key_phrases)
+            self._entity_store = store
+        return store
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to plain JSON-serializable data"""
+        return asdict(self)
+
+    def merge(self, other: 'DocumentAnalysis', candidate_capacity: Optional[int] = None) -> None:
+        """Add the results of analyzing another part of the same document
+
+        With candidate_capacity, candidates stay a uniform sample of at most
+        that many per answer type over both parts.
+        """
+        # Only the strings not seen before are appended, instead of deduplicating everything again
+        store = self.entity_store()
+        for entity_type, entities in other.entities.items():
+            added = store.add(entity_type, entities)
+            if added:
+                self.entities.setdefault(entity_type, []).extend(added)
+        self.key_phrases.extend(store.add(PHRASES, other.key_phrases))
+        for phrase, pos in other.key_phrase_pos.items():
+            self.key_phrase_pos.setdefault(phrase, pos)
+        
+        buckets = self.candidate_buckets()
+        counts = {answer_type: self.mentions(answer_type) for answer_type in buckets}
+        # Seeded from the counts so the same document always merges to the same sample
+        rng = random.Random(sum(counts.values()) + len(self.candidates))
+        for answer_type, candidates in other.candidate_buckets().items():
+            if candidate_capacity is None:
+                buckets.setdefault(answer_type, []).extend(candidates)
+            else:
+                buckets[answer_type] = merge_samples(buckets.get(answer_type, []), counts.get(answer_type, 0),
+                                                     candidates, other.mentions(answer_type), candidate_capacity, rng)
+        for answer_type in other.candidate_buckets():
+            counts[answer_type] = counts.get(answer_type, 0) + other.mentions(answer_type)
+        self.candidate_counts = counts
+        self.candidates = [candidate for candidates in buckets.values() for candidate in candidates]
+        self._distractor_index = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DocumentAnalysis':
+        """Rebuild an analysis stored with to_dict"""
+        return cls(
+            entities=data['entities'],
+            key_phrases=data['key_phrases'],
+            candidates=[Candidate.from_dict(candidate) for candidate in data['candidates']],
+            key_phrase_pos=data.get('key_phrase_pos', {}),
+            candidate_counts=data.get('candidate_counts', {})
+        )
+
 
 class MCQGenerator:
-    def __init__(self):
+    def __init__(self, batch_size: int = 4, n_process: int = 1, max_chunk_size: int = MAX_CHUNK_SIZE,
+                 distractor_ranking: str = 'random', candidate_pool_size: int = 1000,
+                 doc_cache: Optional[DocCache] = None):
         self.min_sentence_length = 10
         self.max_options = 4
+        # 'random' or 'similarity' (needs a model with word vectors, e.g. en_core_web_md)
+        self.distractor_ranking = distractor_ranking
+        # Incremental analysis stops once there are this many distinct answers per question
+        self.candidate_margin = 3
+        self.pages_per_batch = 8
+        # Candidates kept per answer type, sampled uniformly from all mentions in a document
+        if candidate_pool_size < 1:
+            raise ValueError("candidate_pool_size must be at least 1")
+        self.candidate_pool_size = candidate_pool_size
+        # nlp.pipe settings for large documents
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.max_chunk_size = max_chunk_size
+        # Parsed chunks by text and model, so identical text skips the pipeline
+        self.doc_cache = doc_cache
 
-    def extract_entities(self, doc) -> Dict[str, List[str]]:
-        """Extract named entities from the document"""
-        entities = {
-            'PERSON': [],
-            'ORG': [],
-            'GPE': [],  # Geopolitical entities
-            'DATE': [],
-            'MONEY': [],
-            'PERCENT': [],
-            'CARDINAL': [],  # Numbers
-            'EVENT': [],
-            'PRODUCT': [],
-            'WORK_OF_ART': [],
-            'LAW': [],
-            'LANGUAGE': [],
-        }
-        
-        for ent in doc.ents:
-            if ent.label_ in entities and len(ent.text.strip()) > 1:
-                clean_text = ent.text.strip()
-                if len(clean_text) <= 50 and not re.search(r'[^\w\s\-\.\,\']', clean_text):
-                    entities[ent.label_].append(clean_text)
+    def _parse_chunks(self, chunks: List[str], batch_size: Optional[int] = None) -> Iterator:
+        """Parse chunks in order, batched through nlp.pipe
+
+        Yields one Doc per chunk, or None for a chunk that could not be parsed.
+        With a doc cache, chunks parsed before by the same model are loaded from
+        it and the others are parsed and stored.
+        """
+        if self.doc_cache is None:
+            yield from self._pipe_chunks(chunks, batch_size)
+            return
         
-        # Remove duplicates while preserving order
-        for key in entities:
-            entities[key] = list(dict.fromkeys(entities[key]))
+        model_settings = self.model_settings()
+        keys = [self.doc_cache.key(chunk, model_settings) for chunk in chunks]
+        cached = [self.doc_cache.lookup(key) for key in keys]
+        # Only the chunks missing from the cache go through the pipeline, still lazily and in order
+        parsed = self._pipe_chunks([chunk for chunk, hit in zip(chunks, cached) if not hit], batch_size)
+        for chunk, key, hit in zip(chunks, keys, cached):
+            doc = self.doc_cache.load(key, nlp.vocab) if hit else None
+            CACHE_LOOKUPS.inc(cache='doc', result='hit' if doc is not None else 'miss')
+            if doc is None:
+                # A hit can still fail to load if another worker evicted the entry meanwhile
+                doc = next(parsed) if not hit else self._parse_one(chunk)
+                if doc is not None:
+                    self.doc_cache.store(key, doc)
+            yield doc
+
+    def _pipe_chunks(self, chunks: List[str], batch_size: Optional[int] = None) -> Iterator:
+        """Parse chunks through nlp.pipe, falling back to one at a time if a batch fails"""
+        parsed = 0
+        try:
+            for doc in nlp.pipe(chunks, batch_size=batch_size or self.batch_size, n_process=self.n_process):
+                parsed += 1
+                yield doc
+            return
+        except Exception as e:
+            logger.warning(f"Batched parsing failed after {parsed} chunks, continuing serially: {str(e)}")
         
+        for chunk in chunks[parsed:]:
+            yield self._parse_one(chunk)
+
+    def _parse_one(self, chunk: str):
+        """Parse a single chunk, or None if it could not be parsed"""
+        try:
+            return nlp(chunk)
+        except Exception as e:
+            logger.warning(f"Error processing chunk: {str(e)}")
+            return None
+
+    def extract_entities(self, doc) -> Dict[str, List[str]]:
+        """Extract named entities from the document"""
+        entities = {entity_type: [] for entity_type in ENTITY_TYPES}
+        for entity_type, mentions in self.entity_mentions(doc).items():
+            # Remove duplicates while preserving order
+            entities[entity_type] = list(dict.fromkeys(mentions))
         return entities
 
+    def entity_mentions(self, doc) -> Dict[str, List[str]]:
+        """Every usable entity mention in the document by type, repeats included"""
+        mentions = {}
+        for ent in doc.ents:
+            if ent.label_ in ENTITY_TYPES:
+                entity_text = ent.text.strip()
+                if len(entity_text) > 1 and is_clean_entity(entity_text):
+                    mentions.setdefault(ent.label_, []).append(entity_text)
+        return mentions
+
     def extract_key_phrases(self, doc) -> List[str]:
         """Extract key noun phrases and important terms"""
-        key_phrases = []
-        
-        # Extract noun chunks
-        for chunk in doc.noun_chunks:
-            chunk_text = chunk.text.strip()
-            if 2 <= len(chunk_text.split()) <= 5 and len(chunk_text) > 3:
-                if not chunk.root.pos_ in ['PRON', 'DET']:
-                    key_phrases.append(chunk_text)
-        
-        # Extract important single words
-        for token in doc:
-            if (token.pos_ in ['NOUN', 'PROPN'] and 
-                len(token.text) > 3 and 
-                not token.is_stop and 
-                token.is_alpha and 
-                not token.text.lower() in ['said', 'says', 'according', 'including']):
-                key_phrases.append(token.text)
+        return self.extract_key_phrases_with_pos(doc)[0]
+
+    def extract_key_phrases_with_pos(self, doc) -> Tuple[List[str], Dict[str, str]]:
+        """Extract key phrases along with the part of speech each was first seen as"""
+        chunk_counts = Counter()
         
-        # Extract verb phrases for action-based questions
-        for token in doc:
-            if (token.pos_ == 'VERB' and 
-                len(token.text) > 3 and 
-                not token.is_stop and 
-                token.text.lower() not in ['is', 'are', 'was', 'were', 'have', 'has', 'had']):
-                key_phrases.append(token.text)
+        # Extract noun chunks (not available when the profile drops the parser)
+        if doc.has_annotation("DEP"):
+            for chunk in doc.noun_chunks:
+                chunk_text = chunk.text.strip()
+                if 2 <= len(chunk_text.split()) <= 5 and len(chunk_text) > 3:
+                    if not chunk.root.pos_ in ['PRON', 'DET']:
+                        chunk_counts[chunk_text] += 1
         
-        phrase_counts = Counter(key_phrases)
-        return [phrase for phrase, count in phrase_counts.most_common(100)]
-
-    def generate_distractors(self, correct_answer: str, answer_type: str, 
-                           all_entities: Dict, key_phrases: List[str]) -> List[str]:
-        """Generate plausible wrong answers"""
-        distractors = []
+        # Important single words and verbs, filtered in one pass over the token attributes
+        pos, is_stop, is_alpha, length, lower, orth = doc.to_array(KEY_PHRASE_ATTRS).T
+        candidates = (length > 3) & (is_stop == 0)
+        nouns = candidates & np.isin(pos, NOUN_POS) & (is_alpha == 1) & ~np.isin(lower, NOUN_STOPLIST)
+        verbs = candidates & (pos == VERB_POS) & ~np.isin(lower, VERB_STOPLIST)
         
-        # Use entities of the same type
-        if answer_type in all_entities and all_entities[answer_type]:
-            candidates = [ent for ent in all_entities[answer_type] 
-                         if ent != correct_answer and ent.lower() != correct_answer.lower()]
-            if candidates:
-                num_to_take = min(len(candidates), 3)
-                distractors.extend(random.sample(candidates, num_to_take))
+        # Nouns are counted before verbs, like chunks before both, so that equal
+        # counts rank in the order the phrases were first seen
+        token_orths = np.concatenate([orth[nouns], orth[verbs]])
+        token_pos = np.concatenate([pos[nouns], pos[verbs]])
+        unique_orths, first_seen, token_counts = np.unique(token_orths, return_index=True, return_counts=True)
         
-        # Use key phrases if needed
-        if len(distractors) < 3:
-            phrase_candidates = [phrase for phrase in key_phrases 
-                               if phrase != correct_answer and 
-                               phrase.lower() != correct_answer.lower() and 
-                               phrase not in distractors and 
-                               len(phrase.split()) <= 3]  # Prefer shorter phrases
-            needed = 3 - len(distractors)
-            if phrase_candidates:
-                num_to_take = min(len(phrase_candidates), needed)
-                distractors.extend(random.sample(phrase_candidates, num_to_take))
+        chunk_texts = list(chunk_counts)
+        counts = np.concatenate([np.array(list(chunk_counts.values()), dtype=np.int64), token_counts])
+        order = np.concatenate([np.arange(len(chunk_texts)), len(chunk_texts) + first_seen])
+        top = np.lexsort((order, -counts))[:MAX_KEY_PHRASES]
         
-        # Enhanced generic distractors
-        generic_distractors = {
-            'PERSON': ['Albert Einstein', 'Marie Curie', 'Isaac Newton', 'Charles Darwin', 'Leonardo da Vinci'],
-            'ORG': ['Harvard University', 'Stanford University', 'MIT', 'Oxford University', 'Cambridge University'],
-            'GPE': ['United States', 'United Kingdom', 'Germany', 'France', 'Japan', 'China', 'India'],
-            'DATE': ['1990', '2000', '2010', '1985', '1995', '2005', '2015'],
-            'MONEY': ['$1,000', '$5,000', '$10,000', '$500', '$2,000'],
-            'PERCENT': ['25%', '50%', '75%', '10%', '30%', '60%', '90%'],
-            'CARDINAL': ['100', '500', '1000', '50', '200', '300', '750'],
-            'EVENT': ['World War II', 'Industrial Revolution', 'Renaissance', 'Cold War'],
-            'PRODUCT': ['iPhone', 'Windows', 'Android', 'MacBook'],
-            'WORK_OF_ART': ['Mona Lisa', 'The Starry Night', 'The Scream', 'Guernica'],
-        }
+        top_phrases = []
+        phrase_pos = {}
+        for index in top.tolist():
+            if index < len(chunk_texts):
+                phrase = chunk_texts[index]
+                phrase_pos[phrase] = 'CHUNK'
+            else:
+                index -= len(chunk_texts)
+                phrase = doc.vocab.strings[int(unique_orths[index])]
+                phrase_pos[phrase] = POS_NAMES[int(token_pos[first_seen[index]])]
+            top_phrases.append(phrase)
+        return top_phrases, phrase_pos
+
+    def find_candidate_questions(self, doc, entity_types, pool: Optional[CandidatePool] = None) -> List[Candidate]:
+        """Find sentence/answer pairs using the entities already tagged on the parsed document
+
+        With a pool, only mentions that win a slot in it become candidates; they
+        are put in the pool and also returned.
+        """
+        candidates = []
+        # Span.ents rebuilds doc.ents on every call, so walk the document's entities once instead
+        ents = doc.ents
+        next_ent = 0
         
-        if len(distractors) < 3 and answer_type in generic_distractors:
-            generic_options = [opt for opt in generic_distractors[answer_type] 
-                             if opt != correct_answer and opt not in distractors]
-            needed = 3 - len(distractors)
-            if generic_options:
-                num_to_take = min(len(generic_options), needed)
-                distractors.extend(random.sample(generic_options, num_to_take))
+        for sent in doc.sents:
+            # Skip entities that start before this sentence (including ones crossing into it)
+            while next_ent < len(ents) and ents[next_ent].start < sent.start:
+                next_ent += 1
+            sent_ents = []
+            while next_ent < len(ents) and ents[next_ent].end <= sent.end:
+                sent_ents.append(ents[next_ent])
+                next_ent += 1
+            
+            sent_text = sent.text.strip()
+            if len(sent_text) < self.min_sentence_length or len(sent_text) > 300:
+                continue
+            
+            # Character offset of the stripped sentence within the document
+            sent_start = sent.start_char + len(sent.text) - len(sent.text.lstrip())
+            
+            for ent in sent_ents:
+                answer = ent.text.strip()
+                if ent.label_ in entity_types and len(answer) > 1:
+                    slot = pool.offer(ent.label_) if pool else None
+                    if pool and slot is None:
+                        continue
+                    answer_start = ent.start_char + len(ent.text) - len(ent.text.lstrip()) - sent_start
+                    candidate = Candidate(sent_text, answer, ent.label_, answer_start, answer_start + len(answer))
+                    if pool:
+                        pool.put(slot, candidate)
+                    candidates.append(candidate)
         
-        return distractors[:3]
+        return candidates
+
+    def generate_distractors(self, correct_answer: str, answer_type: str,
+                             distractor_index: DistractorIndex,
+                             rng: Optional[random.Random] = None) -> List[str]:
+        """Generate plausible wrong answers"""
+        return distractor_index.distractors(correct_answer, answer_type, 3, rng)
 
     def create_fill_in_blank_question(self, sentence: str, answer: str, answer_type: str,
-                                    all_entities: Dict, key_phrases: List[str]) -> Dict[str, Any]:
+                                    distractor_index: DistractorIndex,
+                                    rng: Optional[random.Random] = None,
+                                    answer_start: Optional[int] = None,
+                                    answer_end: Optional[int] = None) -> Dict[str, Any]:
         """Create a fill-in-the-blank question"""
-        # Create question by replacing the answer with blank
-        question_text = re.sub(re.escape(answer), "______", sentence, count=1, flags=re.IGNORECASE)
+        rng = rng or random.Random()
+        # Create question by replacing the answer (at its known offsets, if given) with blank
+        question_text = blank_out(sentence, answer, answer_start, answer_end)
         
         if question_text == sentence:
+            QUESTIONS_REJECTED.inc(reason='answer_not_in_sentence')
             return None
         
-        distractors = self.generate_distractors(answer, answer_type, all_entities, key_phrases)
+        distractors = self.generate_distractors(answer, answer_type, distractor_index, rng)
         if len(distractors) < 2:
+            QUESTIONS_REJECTED.inc(reason='too_few_distractors')
             return None
         
         options = [answer] + distractors
-        random.shuffle(options)
+        rng.shuffle(options)
         
         return {
             'question': f"Fill in the blank: {question_text}",
@@ -156,8 +447,10 @@ class MCQGenerator:
         }
 
     def create_direct_question(self, sentence: str, answer: str, answer_type: str,
-                             all_entities: Dict, key_phrases: List[str]) -> Dict[str, Any]:
+                             distractor_index: DistractorIndex,
+                             rng: Optional[random.Random] = None) -> Dict[str, Any]:
         """Create a direct question about the content"""
+        rng = rng or random.Random()
         question_templates = {
             'PERSON': [
                 f"Who is mentioned in the following context: '{sentence[:100]}...'?",
@@ -182,16 +475,18 @@ class MCQGenerator:
         }
         
         if answer_type not in question_templates:
+            QUESTIONS_REJECTED.inc(reason='no_question_template')
             return None
         
-        question_text = random.choice(question_templates[answer_type])
-        distractors = self.generate_distractors(answer, answer_type, all_entities, key_phrases)
+        question_text = rng.choice(question_templates[answer_type])
+        distractors = self.generate_distractors(answer, answer_type, distractor_index, rng)
         
         if len(distractors) < 2:
+            QUESTIONS_REJECTED.inc(reason='too_few_distractors')
             return None
         
         options = [answer] + distractors
-        random.shuffle(options)
+        rng.shuffle(options)
         
         return {
             'question': question_text,
@@ -210,141 +505,408 @@ class MCQGenerator:
         else:
             return 'hard'
 
-    def generate_mcqs_from_text(self, text: str, num_questions: int = 5) -> List[Dict[str, Any]]:
-        """Generate MCQs from the given text"""
-        try:
-            if not nlp:
-                logger.error("spaCy model not loaded")
-                return []
-            
-            # Clean and preprocess text
-            text = re.sub(r'\s+', ' ', text.strip())
-            text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\$\[\]\"\'\/]', '', text)
-            
-            # Process with spaCy in chunks to handle large texts
-            max_chunk_size = 1000000  # 1MB chunks
-            chunks = [text[i:i+max_chunk_size] for i in range(0, len(text), max_chunk_size)]
-            
-            all_entities = {}
-            all_key_phrases = []
-            potential_questions = []
-            
-            for chunk in chunks:
-                try:
-                    doc = nlp(chunk)
-                    
-                    # Extract entities and phrases from this chunk
-                    chunk_entities = self.extract_entities(doc)
-                    chunk_key_phrases = self.extract_key_phrases(doc)
-                    
-                    # Merge entities
-                    for entity_type, entities in chunk_entities.items():
-                        if entity_type not in all_entities:
-                            all_entities[entity_type] = []
-                        all_entities[entity_type].extend(entities)
-                    
-                    all_key_phrases.extend(chunk_key_phrases)
-                    
-                    # Find potential questions in this chunk
-                    for sent in doc.sents:
-                        sent_text = sent.text.strip()
-                        if len(sent_text) < self.min_sentence_length:
-                            continue
-                        
-                        sent_doc = nlp(sent_text)
-                        for ent in sent_doc.ents:
-                            if (ent.label_ in all_entities and 
-                                len(ent.text.strip()) > 1 and 
-                                len(sent_text) <= 300):  # Reasonable sentence length
-                                potential_questions.append({
-                                    'sentence': sent_text,
-                                    'answer': ent.text.strip(),
-                                    'type': ent.label_
-                                })
+    def analyze_text(self, text: str,
+                     progress: Optional[Callable[[int, int], None]] = None) -> 'DocumentAnalysis':
+        """Run the NLP analysis: entities, key phrases and candidate sentence/answer pairs
+
+        progress, if given, is called with (chunks_parsed, total_chunks) after each chunk.
+        """
+        # Split on paragraph/page boundaries and clean each chunk
+        with timed('normalization'):
+            chunks = split_into_chunks(text, self.max_chunk_size)
+        return self._analyze_docs(self._parse_chunks(chunks), len(chunks), progress)
+
+    def analyze_texts(self, texts: List[str]) -> Iterator['DocumentAnalysis']:
+        """Analyze several texts through one nlp.pipe stream, yielding an analysis per text in order
+
+        Batching across texts lets spaCy fill its batches with many short
+        passages instead of parsing each one on its own.
+        """
+        with timed('normalization'):
+            chunks_per_text = [split_into_chunks(text, self.max_chunk_size) for text in texts]
+        all_chunks = [chunk for chunks in chunks_per_text for chunk in chunks]
+        # Short passages: as many chunks per batch as fit in batch_size full-size chunks
+        longest = max((len(chunk) for chunk in all_chunks), default=1)
+        batch_size = max(self.batch_size, min(1000, self.batch_size * self.max_chunk_size // longest))
+        
+        docs = self._parse_chunks(all_chunks, batch_size)
+        for chunks in chunks_per_text:
+            yield self._analyze_docs(islice(docs, len(chunks)), len(chunks))
+
+    def _analyze_docs(self, docs: Iterable, total_chunks: int,
+                      progress: Optional[Callable[[int, int], None]] = None) -> 'DocumentAnalysis':
+        """Merge entities, key phrases and candidates of a text's parsed chunks"""
+        store = EntityStore()
+        # Seeded so the same text always keeps the same candidates
+        pool = CandidatePool(self.candidate_pool_size, random.Random(0))
+        parse_seconds = extraction_seconds = candidate_seconds = 0.0
+        chunks_parsed = 0
+        
+        # Docs come back in chunk order, so merging stays deterministic. They are
+        # parsed lazily, so the wait for the next one is the time spaCy took.
+        waiting_since = time.perf_counter()
+        for chunks_parsed, doc in enumerate(docs, 1):
+            parse_seconds += time.perf_counter() - waiting_since
+            if progress:
+                progress(chunks_parsed, total_chunks)
+            if doc is None:
+                waiting_since = time.perf_counter()
+                continue
+            try:
+                # Extract entities and phrases from this chunk and merge them into the store
+                extraction_start = time.perf_counter()
+                for entity_type, mentions in self.entity_mentions(doc).items():
+                    store.add(entity_type, mentions)
+                chunk_key_phrases, chunk_phrase_pos = self.extract_key_phrases_with_pos(doc)
+                store.add(PHRASES, chunk_key_phrases, [chunk_phrase_pos[phrase] for phrase in chunk_key_phrases])
                 
-                except Exception as e:
-                    logger.warning(f"Error processing chunk: {str(e)}")
-                    continue
-            
-            # Remove duplicate entities
-            for entity_type in all_entities:
-                all_entities[entity_type] = list(dict.fromkeys(all_entities[entity_type]))
+                # Find potential questions in this chunk
+                candidate_start = time.perf_counter()
+                extraction_seconds += candidate_start - extraction_start
+                self.find_candidate_questions(doc, ENTITY_TYPES, pool)
+                candidate_seconds += time.perf_counter() - candidate_start
             
-            all_key_phrases = list(dict.fromkeys(all_key_phrases))
-            
-            logger.info(f"Extracted entities: {sum(len(v) for v in all_entities.values())}")
-            logger.info(f"Found {len(potential_questions)} potential questions")
+            except Exception as e:
+                logger.warning(f"Error processing chunk: {str(e)}")
+            waiting_since = time.perf_counter()
+        
+        record_stage('spacy_parse', parse_seconds)
+        record_stage('entity_phrase_extraction', extraction_seconds)
+        record_stage('candidate_building', candidate_seconds)
+        CHUNKS_PARSED.inc(chunks_parsed)
+        CANDIDATES_FOUND.inc(sum(pool.seen.values()))
+        
+        # Strings are built only now, once per distinct entity and phrase
+        entity_types = store.entity_types()
+        all_entities = {entity_type: store.texts(entity_type) for entity_type in entity_types}
+        logger.info(f"Extracted entities: {sum(map(store.distinct, entity_types))} "
+                    f"(from {sum(map(store.mentions, entity_types))} mentions)")
+        potential_questions = [candidate for candidates in pool.reservoirs.values() for candidate in candidates]
+        logger.info(f"Found {sum(pool.seen.values())} potential questions, kept {len(potential_questions)}")
+        
+        return DocumentAnalysis(
+            entities=all_entities,
+            key_phrases=store.texts(PHRASES),
+            candidates=potential_questions,
+            key_phrase_pos=store.tags(PHRASES),
+            candidate_counts=dict(pool.seen)
+        )
+
+    def iter_page_analyses(self, page_texts: Iterable[str], num_questions: int,
+                           stop_early: bool = True) -> Iterator[Tuple['DocumentAnalysis', 'DocumentAnalysis', int]]:
+        """Analyze pages in small batches, yielding (batch analysis, merged analysis, pages analyzed)
+
+        page_texts is consumed lazily, so pages after the stopping point are never
+        extracted. With stop_early, batches stop once there are enough diverse
+        candidates: distinct answers are counted per entity type, capped at
+        num_questions each so that one dominant type cannot end the search alone.
+        """
+        analysis = DocumentAnalysis(entities={}, key_phrases=[], candidates=[])
+        answers_by_type = {}
+        pages_analyzed = 0
+        page_iter = iter(page_texts)
+        
+        while True:
+            batch = list(islice(page_iter, self.pages_per_batch))
+            if not batch:
+                break
             
-            # Generate MCQs
-            mcqs = []
-            used_answers = set()
-            random.shuffle(potential_questions)
+            # Form feeds keep the page boundaries visible to split_into_chunks
+            batch_analysis = self.analyze_text('\f'.join(batch))
+            analysis.merge(batch_analysis, self.candidate_pool_size)
+            pages_analyzed += len(batch)
+            yield batch_analysis, analysis, pages_analyzed
             
-            # Prioritize different entity types for variety
-            entity_priority = ['PERSON', 'ORG', 'GPE', 'DATE', 'EVENT', 'PRODUCT', 'MONEY', 'PERCENT']
+            if not stop_early:
+                continue
+            for candidate in batch_analysis.candidates:
+                answers_by_type.setdefault(candidate.type, set()).add(candidate.answer.lower())
+            diverse_answers = sum(min(len(answers), num_questions) for answers in answers_by_type.values())
+            if diverse_answers >= self.candidate_margin * num_questions:
+                logger.info(f"Found {diverse_answers} diverse answers after {pages_analyzed} pages, stopping early")
+                break
+
+    def analyze_pages(self, page_texts: Iterable[str], num_questions: int,
+                      progress: Optional[Callable[[int], None]] = None) -> 'DocumentAnalysis':
+        """Analyze pages in small batches, stopping once there are enough diverse candidates
+
+        progress, if given, is called with the number of pages analyzed so far.
+        """
+        analysis = DocumentAnalysis(entities={}, key_phrases=[], candidates=[])
+        for _, analysis, pages_analyzed in self.iter_page_analyses(page_texts, num_questions):
+            if progress:
+                progress(pages_analyzed)
+        return analysis
+
+    def stream_pages(self, page_texts: Iterable[str], num_questions: int,
+                     rng: Optional[random.Random] = None,
+                     stop_early: bool = False,
+                     corpus_entities: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict[str, Any]]:
+        """Analyze pages in batches and yield MCQs as soon as the pages read so far support them
+
+        Yields {'event': 'parsed', 'pages_analyzed': n} after each batch,
+        {'event': 'question', 'question': mcq} for each MCQ, and finally
+        {'event': 'analysis', 'analysis': analysis} with everything analyzed.
+        Without stop_early every page is analyzed after the questions are out,
+        so that the final analysis can be reused for later exams.
+        corpus_entities backs up the document's entities as distractors.
+        """
+        rng = rng or random.Random()
+        analysis = DocumentAnalysis(entities={}, key_phrases=[], candidates=[])
+        used_answers = set()
+        produced = 0
+        
+        for batch_analysis, analysis, pages_analyzed in self.iter_page_analyses(page_texts, num_questions, stop_early):
+            yield {'event': 'parsed', 'pages_analyzed': pages_analyzed}
+            if produced >= num_questions:
+                continue
             
-            for entity_type in entity_priority:
-                if len(mcqs) >= num_questions:
-                    break
-                
-                type_questions = [q for q in potential_questions if q['type'] == entity_type]
-                for item in type_questions:
-                    if len(mcqs) >= num_questions:
-                        break
-                    
-                    if item['answer'].lower() in used_answers:
+            # Distractors come from every page read so far
+            distractor_index = analysis.distractor_index(self._vectors_model(), corpus_entities)
+            mcqs = self.iter_mcqs(batch_analysis.candidate_buckets(), distractor_index, num_questions - produced, rng,
+                                  used_answers)
+            for mcq in timed_iter('assembly', mcqs):
+                produced += 1
+                yield {'event': 'question', 'question': mcq}
+        
+        logger.info(f"Generated {produced} MCQs")
+        yield {'event': 'analysis', 'analysis': analysis}
+
+    def _vectors_model(self):
+        """The model used to rank distractors by similarity, or None to pick them at random"""
+        if self.distractor_ranking != 'similarity':
+            return None
+        if not has_vectors(nlp):
+            if not getattr(self, '_warned_no_vectors', False):
+                logger.warning(f"Model {MODEL_NAME} has no word vectors, picking distractors at random")
+                self._warned_no_vectors = True
+            return None
+        return nlp
+
+    def iter_mcqs(self, candidate_buckets: Dict[str, List[Candidate]], distractor_index: DistractorIndex,
+                  num_questions: int, rng, used_answers: Optional[set] = None) -> Iterator[Dict[str, Any]]:
+        """Yield up to num_questions MCQs from candidates grouped by type, as each is built
+
+        The priority types take turns, one question each per round, then the
+        other types do the same for the slots left. Candidates are drawn at
+        random within their type, so the work depends on num_questions rather
+        than on the number of candidates. Answers already in used_answers
+        (case-folded) are skipped and new ones are added to it.
+        """
+        used_answers = set() if used_answers is None else used_answers
+        produced = 0
+        
+        priority_types = [t for t in QUESTION_TYPE_PRIORITY if candidate_buckets.get(t)]
+        other_types = sorted(t for t in candidate_buckets if t not in QUESTION_TYPE_PRIORITY and candidate_buckets[t])
+        # Only priority types get a direct question when the answer cannot be blanked
+        for types, direct in ((priority_types, True), (other_types, False)):
+            draws = {t: random_order(candidate_buckets[t], rng) for t in types}
+            while draws:
+                for entity_type in list(draws):
+                    if produced >= num_questions:
+                        return
+                    mcq = self._next_mcq(draws[entity_type], distractor_index, rng, used_answers, direct)
+                    if mcq is None:
+                        # Every candidate of this type is used up
+                        del draws[entity_type]
                         continue
-                    
-                    # Try both question types
-                    mcq = self.create_fill_in_blank_question(
-                        item['sentence'], item['answer'], item['type'],
-                        all_entities, all_key_phrases
-                    )
-                    
-                    if not mcq:
-                        mcq = self.create_direct_question(
-                            item['sentence'], item['answer'], item['type'],
-                            all_entities, all_key_phrases
-                        )
-                    
-                    if mcq:
-                        mcqs.append(mcq)
-                        used_answers.add(item['answer'].lower())
-            
-            # Fill remaining slots with any available questions
-            remaining_questions = [q for q in potential_questions 
-                                 if q['answer'].lower() not in used_answers]
+                    produced += 1
+                    QUESTIONS_GENERATED.inc()
+                    yield mcq
+
+    def _next_mcq(self, draw: Iterator[Candidate], distractor_index: DistractorIndex, rng,
+                  used_answers: set, direct: bool) -> Optional[Dict[str, Any]]:
+        """Build an MCQ from the next usable candidate of a draw, or None once it runs out"""
+        for item in draw:
+            answer_key = item.answer.casefold()
+            if answer_key in used_answers:
+                continue
             
-            for item in remaining_questions:
-                if len(mcqs) >= num_questions:
-                    break
-                
-                mcq = self.create_fill_in_blank_question(
-                    item['sentence'], item['answer'], item['type'],
-                    all_entities, all_key_phrases
+            mcq = self.create_fill_in_blank_question(
+                item.sentence, item.answer, item.type,
+                distractor_index, rng, item.answer_start, item.answer_end
+            )
+            if not mcq and direct:
+                mcq = self.create_direct_question(
+                    item.sentence, item.answer, item.type,
+                    distractor_index, rng
                 )
-                
-                if mcq:
-                    mcqs.append(mcq)
-                    used_answers.add(item['answer'].lower())
             
-            logger.info(f"Generated {len(mcqs)} MCQs")
-            return mcqs
+            if mcq:
+                used_answers.add(answer_key)
+                return mcq
+        return None
+
+    def generate_mcqs_from_analysis(self, analysis: 'DocumentAnalysis', num_questions: int = 5,
+                                    rng: Optional[random.Random] = None,
+                                    corpus_entities: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """Assemble MCQs from a previously computed analysis"""
+        return list(self.iter_mcqs_from_analysis(analysis, num_questions, rng, corpus_entities))
+
+    def iter_mcqs_from_analysis(self, analysis: 'DocumentAnalysis', num_questions: int = 5,
+                                rng: Optional[random.Random] = None,
+                                corpus_entities: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield MCQs from a previously computed analysis as each is built
+
+        corpus_entities (type -> texts) from other documents of the course back up
+        the document's own entities as distractors.
+        """
+        rng = rng or random.Random()
+        distractor_index = analysis.distractor_index(self._vectors_model(), corpus_entities)
+        
+        produced = 0
+        mcqs = self.iter_mcqs(analysis.candidate_buckets(), distractor_index, num_questions, rng)
+        for mcq in timed_iter('assembly', mcqs):
+            produced += 1
+            yield mcq
+        logger.info(f"Generated {produced} MCQs")
+
+    def generate_mcqs_from_text(self, text: str, num_questions: int = 5,
+                                rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        """Generate MCQs from the given text"""
+        return list(self.iter_mcqs_from_text(text, num_questions, rng))
+
+    def iter_mcqs_from_text(self, text: str, num_questions: int = 5,
+                            rng: Optional[random.Random] = None) -> Iterator[Dict[str, Any]]:
+        """Yield MCQs from the given text as each is built"""
+        try:
+            if not nlp:
+                logger.error("spaCy model not loaded")
+                return
+            
+            analysis = self.analyze_text(text)
+            yield from self.iter_mcqs_from_analysis(analysis, num_questions, rng)
             
         except Exception as e:
             logger.error(f"Error generating MCQs: {str(e)}")
-            return []
+
+    def model_settings(self) -> Dict[str, Any]:
+        """The model and components that parse text, used to key cached parses"""
+        return {
+            'model': f"{nlp.meta.get('lang')}_{nlp.meta.get('name')}" if nlp else None,
+            'model_version': nlp.meta.get('version') if nlp else None,
+            'profile': GENERATION_PROFILE,
+            'pipeline': nlp.pipe_names if nlp else []
+        }
+
+    def settings(self) -> Dict[str, Any]:
+        """Settings that change the analysis output, used to key cached results"""
+        return {
+            **self.model_settings(),
+            'min_sentence_length': self.min_sentence_length,
+            'max_chunk_size': self.max_chunk_size,
+            'candidate_margin': self.candidate_margin,
+            'candidate_pool_size': self.candidate_pool_size,
+            'pages_per_batch': self.pages_per_batch
+        }
 
 
 # Global generator instance
-generator = MCQGenerator()
+generator = MCQGenerator(
+    batch_size=int(os.environ.get('MCQ_BATCH_SIZE', 4)),
+    n_process=int(os.environ.get('MCQ_N_PROCESS', 1)),
+    distractor_ranking=os.environ.get('MCQ_DISTRACTOR_RANKING', 'random'),
+    candidate_pool_size=int(os.environ.get('MCQ_CANDIDATE_POOL_SIZE', 1000)),
+    doc_cache=create_doc_cache_from_env()
+)
+
+
+def generate_mcqs(text: str, num_questions: int = 5, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Main function to generate MCQs from text; the same text and seed give the same MCQs"""
+    if not text or not text.strip():
+        return []
+    return generator.generate_mcqs_from_text(text, num_questions, random.Random(seed))
 
 
-def generate_mcqs(text: str, num_questions: int = 5) -> List[Dict[str, Any]]:
-    """Main function to generate MCQs from text"""
+def analyze_text(text: str, progress: Optional[Callable[[int, int], None]] = None) -> Optional[DocumentAnalysis]:
+    """Analyze text once so questions can be assembled from it repeatedly"""
+    if not nlp:
+        logger.error("spaCy model not loaded")
+        return None
     if not text or not text.strip():
+        return None
+    try:
+        return generator.analyze_text(text, progress)
+    except Exception as e:
+        logger.error(f"Error analyzing text: {str(e)}")
+        return None
+
+
+def analyze_pages(page_texts: Iterable[str], num_questions: int,
+                  progress: Optional[Callable[[int], None]] = None) -> Optional[DocumentAnalysis]:
+    """Analyze pages lazily until there are enough candidates for num_questions"""
+    if not nlp:
+        logger.error("spaCy model not loaded")
+        return None
+    try:
+        return generator.analyze_pages(page_texts, num_questions, progress)
+    except Exception as e:
+        logger.error(f"Error analyzing text: {str(e)}")
+        return None
+
+
+def stream_pages(page_texts: Iterable[str], num_questions: int,
+                 stop_early: bool = False, seed: Optional[int] = None,
+                 corpus_entities: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield MCQs and progress events while pages are analyzed (see MCQGenerator.stream_pages)"""
+    if not nlp:
+        logger.error("spaCy model not loaded")
+        return
+    yield from generator.stream_pages(page_texts, num_questions, random.Random(seed), stop_early=stop_early,
+                                      corpus_entities=corpus_entities)
+
+
+def analyze_texts(texts: List[str]) -> Iterator[Optional[DocumentAnalysis]]:
+    """Analyze several texts in one batched pass, yielding an analysis (or None on errors) per text"""
+    if not nlp:
+        logger.error("spaCy model not loaded")
+        yield from (None for _ in texts)
+        return
+    analyzed = 0
+    try:
+        for analysis in generator.analyze_texts(texts):
+            analyzed += 1
+            yield analysis
+    except Exception as e:
+        logger.error(f"Error analyzing texts: {str(e)}")
+        yield from (None for _ in texts[analyzed:])
+
+
+def sample_questions(analysis: DocumentAnalysis, num_questions: int = 5, seed: Optional[int] = None,
+                     corpus_entities: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+    """Draw a new set of MCQs from an existing analysis without re-running spaCy
+
+    corpus_entities (type -> texts), typically from a CorpusIndex, adds
+    distractors from other documents of the same course.
+    """
+    try:
+        return generator.generate_mcqs_from_analysis(analysis, num_questions, random.Random(seed), corpus_entities)
+    except Exception as e:
+        logger.error(f"Error generating MCQs: {str(e)}")
         return []
-    return generator.generate_mcqs_from_text(text, num_questions)
+
+
+# Short document used to exercise the whole pipeline at startup
+WARM_UP_TEXT = """
+Albert Einstein was a German-born theoretical physicist who developed the theory of relativity.
+He was born in 1879 in Ulm, Germany. Einstein won the Nobel Prize in Physics in 1921.
+He worked at Princeton University from 1933 until his death in 1955.
+"""
+
+
+def warm_up() -> None:
+    """Run a sample document through the model and generator once
+
+    Called in the gunicorn master before it forks so that lazily built model
+    state (vocab and string store growth, first-call allocations) is created
+    once and shared copy-on-write by every worker.
+    """
+    if not nlp:
+        return
+    start = time.perf_counter()
+    analysis = generator.analyze_text(WARM_UP_TEXT)
+    generator.generate_mcqs_from_analysis(analysis, 3, random.Random(0))
+    logger.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
 
 
 def is_spacy_available() -> bool:
@@ -355,14 +917,8 @@ def is_spacy_available() -> bool:
 # Example usage
 if __name__ == "__main__":
     # Test the MCQ generator
-    sample_text = """
-    Albert Einstein was a German-born theoretical physicist who developed the theory of relativity.
-    He was born in 1879 in Ulm, Germany. Einstein won the Nobel Prize in Physics in 1921.
-    He worked at Princeton University from 1933 until his death in 1955.
-    """
-    
     print("Testing MCQ Generator...")
-    mcqs = generate_mcqs(sample_text, 3)
+    mcqs = generate_mcqs(WARM_UP_TEXT, 3)
     
     for i, mcq in enumerate(mcqs, 1):
         print(f"\nQuestion {i}: {mcq['question']}")
@@ -0,0 +1,166 @@
+import logging
+import math
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+
+import PyPDF2
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Below this many pages a process pool costs more than it saves
+MIN_PAGES_FOR_POOL = 16
+
+
+@dataclass
+class PageResult:
+    """Text extracted from one page (numbered from 1) and how long it took"""
+    number: int
+    text: str
+    seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class ExtractionResult:
+    """Per-page extraction results in page order"""
+    pages: List[PageResult]
+
+    @property
+    def text(self) -> str:
+        """Non-empty page texts joined in one pass by form feeds, which split_into_chunks treats as boundaries
+
+        PyPDF2 rarely emits blank lines, so page breaks are the only paragraph
+        boundaries most extracted text has.
+        """
+        return '\f'.join(page.text for page in self.pages if page.text.strip())
+
+    @property
+    def pages_processed(self) -> int:
+        return sum(1 for page in self.pages if page.text.strip())
+
+    @property
+    def failed_pages(self) -> List[PageResult]:
+        return [page for page in self.pages if page.error]
+
+
+def default_processes() -> int:
+    """Worker processes for extraction, from MCQ_PDF_PROCESSES or the CPU count"""
+    return int(os.environ.get('MCQ_PDF_PROCESSES', min(4, os.cpu_count() or 1)))
+
+
+@contextmanager
+def open_pdf(path: str) -> Iterator[PyPDF2.PdfReader]:
+    """Open a PDF through a read-only memory map
+
+    PdfReader(path) would read the whole file into a BytesIO; the map lets the
+    OS page in only what the reader touches and shares those pages between the
+    extraction processes.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("PDF file is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield PyPDF2.PdfReader(mapped)
+
+
+def page_order(total_pages: int, page_start: Optional[int] = None, page_end: Optional[int] = None,
+               spread: bool = False) -> List[int]:
+    """0-based indexes of the pages in a 1-based inclusive range
+
+    With spread=True the first pages visited are evenly spaced across the range
+    (every sqrt(n)-th page, then the next offset, and so on) so that an early
+    stop still samples the whole document.
+    """
+    start = max(1, page_start or 1) - 1
+    stop = min(total_pages, page_end or total_pages)
+    indexes = list(range(start, stop))
+    if spread and indexes:
+        stride = max(1, math.isqrt(len(indexes)))
+        indexes = [index for offset in range(stride) for index in indexes[offset::stride]]
+    return indexes
+
+
+def _extract_page(reader: PyPDF2.PdfReader, index: int) -> PageResult:
+    start = time.perf_counter()
+    try:
+        text = reader.pages[index].extract_text() or ''
+        error = None
+    except Exception as e:
+        text = ''
+        error = str(e)
+    return PageResult(number=index + 1, text=text, seconds=time.perf_counter() - start, error=error)
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[PageResult]:
+    """Worker entry point: open the PDF independently and extract pages [start, stop)"""
+    with open_pdf(path) as reader:
+        return [_extract_page(reader, index) for index in range(start, stop)]
+
+
+def extract_pdf_text(path: str, processes: Optional[int] = None,
+                     progress: Optional[Callable[[int, int], None]] = None,
+                     page_start: Optional[int] = None, page_end: Optional[int] = None) -> ExtractionResult:
+    """Extract the text of a PDF file's pages, in a process pool for large documents
+
+    Only pages page_start..page_end (1-based, inclusive) are read when given.
+    progress, if given, is called with (pages_extracted, total_pages) as pages finish.
+    Pages that fail are kept in the result with their error instead of aborting.
+    """
+    processes = processes or default_processes()
+    progress = progress or (lambda pages_extracted, total: None)
+
+    # Raises for files PyPDF2 cannot read at all
+    with open_pdf(path) as reader:
+        indexes = page_order(len(reader.pages), page_start, page_end)
+        total_pages = len(indexes)
+        serial = processes <= 1 or total_pages < MIN_PAGES_FOR_POOL
+        if serial:
+            pages = []
+            for index in indexes:
+                pages.append(_extract_page(reader, index))
+                progress(len(pages), total_pages)
+
+    if not serial:
+        # Several contiguous batches per worker keep the pool busy when page costs vary
+        batch_size = max(1, total_pages // (processes * 4))
+        first, last = indexes[0], indexes[-1] + 1
+        pages = []
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(_extract_page_range, path, start, min(start + batch_size, last))
+                for start in range(first, last, batch_size)
+            ]
+            for future in as_completed(futures):
+                pages.extend(future.result())
+                progress(len(pages), total_pages)
+        pages.sort(key=lambda page: page.number)
+
+    for page in pages:
+        if page.error:
+            logger.warning(f"Could not extract text from page {page.number}: {page.error}")
+
+    return ExtractionResult(pages=pages)
+
+
+def iter_pdf_pages(path: str, page_start: Optional[int] = None, page_end: Optional[int] = None,
+                   spread: bool = False,
+                   progress: Optional[Callable[[int, int], None]] = None) -> Iterator[PageResult]:
+    """Lazily extract pages one at a time, for callers that may stop early
+
+    spread=True visits pages spread evenly across the range first (see page_order).
+    """
+    with open_pdf(path) as reader:
+        indexes = page_order(len(reader.pages), page_start, page_end, spread)
+        for extracted, index in enumerate(indexes, 1):
+            page = _extract_page(reader, index)
+            if page.error:
+                logger.warning(f"Could not extract text from page {page.number}: {page.error}")
+            if progress:
+                progress(extracted, len(indexes))
+            yield page
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Keys are SHA-256 hex digests, which is also what keeps them inside a disk cache's directory
+CACHE_KEY_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+
+def is_cache_key(key: Any) -> bool:
+    """Whether key has the form of a key built by make_cache_key"""
+    return isinstance(key, str) and CACHE_KEY_PATTERN.fullmatch(key) is not None
+
+
+def make_cache_key(content_hash: str, settings: Dict[str, Any]) -> str:
+    """Build a cache key from the SHA-256 of the upload and the generation settings"""
+    payload = json.dumps({'content': content_hash, 'settings': settings}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _entry_size(value: Dict[str, Any]) -> int:
+    """Approximate size of a cache entry: the length of its extracted text plus the JSON size of the rest
+
+    The text, up to hundreds of MB, is measured rather than serialized.
+    """
+    text = value.get('text')
+    if not isinstance(text, str):
+        return len(json.dumps(value))
+    return len(text) + len(json.dumps({name: field for name, field in value.items() if name != 'text'}))
+
+
+class MemoryBackend:
+    """In-process LRU store bounded by number of entries and, optionally, their total size
+
+    An entry's size approximates the memory its text and analysis hold (see
+    _entry_size). An entry larger than max_bytes on its own is not kept.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        size = _entry_size(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._discard(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self._total_bytes > self.max_bytes):
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: str) -> None:
+        if key in self._entries:
+            del self._entries[key]
+            self._total_bytes -= self._sizes.pop(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskBackend:
+    """JSON files in a directory, shareable across gunicorn workers
+
+    Entries are written atomically and their modification time doubles as the
+    LRU clock: reads touch the file and eviction removes the oldest files once
+    the directory grows past max_bytes. Subclasses store other formats by
+    overriding suffix, _read and _write.
+    """
+    suffix = '.json'
+
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        if not is_cache_key(key):
+            raise ValueError(f"Invalid cache key: {key!r}")
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def _read(self, path: str) -> Any:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write(self, fd: int, value: Any) -> None:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            value = self._read(path)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {str(e)}")
+            self._remove(path)
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            self._write(fd, value)
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the directory fits in max_bytes"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(self.suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Evicted concurrently by another worker
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def __len__(self) -> int:
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(self.suffix))
+
+
+class ResultCache:
+    """Cache of extracted text and analysis artifacts with hit/miss counters"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Cache lookup failed: {str(e)}")
+            value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        """Whether an entry exists, without reading it or counting a lookup"""
+        try:
+            return key in self.backend
+        except Exception:
+            return False
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            logger.warning(f"Could not store cache entry: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for this process; disk entries are shared by all workers"""
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': len(self.backend),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+def create_cache_from_env() -> ResultCache:
+    """Use the disk backend when MCQ_CACHE_DIR is set, otherwise an in-memory LRU"""
+    cache_dir = os.environ.get('MCQ_CACHE_DIR')
+    if cache_dir:
+        max_bytes = int(os.environ.get('MCQ_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+        return ResultCache(DiskBackend(cache_dir, max_bytes))
+    return ResultCache(MemoryBackend(int(os.environ.get('MCQ_CACHE_MAX_ENTRIES', 32)),
+                                     int(os.environ.get('MCQ_CACHE_MAX_MEMORY_BYTES', 128 * 1024 * 1024))))
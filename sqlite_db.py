@@ -0,0 +1,24 @@
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def connect(db_path: str) -> Iterator[sqlite3.Connection]:
+    """A connection that commits (or rolls back) its transaction and is closed on exit
+
+    Open one per call: sqlite3 connections must not cross threads or forks.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def create_schema(db_path: str, schema: str) -> None:
+    """Create a database's tables and indexes, in WAL mode so polls from other workers do not block writers"""
+    with connect(db_path) as conn:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(schema)
@@ -0,0 +1,54 @@
+import pytest
+import spacy
+
+from benchmarks.bench_sentence_parse import legacy_candidates
+from mcq_generator import MCQGenerator
+
+PATTERNS = [
+    {'label': 'PERSON', 'pattern': 'Ada Lovelace'},
+    {'label': 'PERSON', 'pattern': 'Charles Babbage'},
+    {'label': 'PERSON', 'pattern': 'Babbage'},
+    {'label': 'GPE', 'pattern': 'London'},
+    {'label': 'DATE', 'pattern': '1815'},
+    {'label': 'DATE', 'pattern': '1843'},
+    {'label': 'ORG', 'pattern': 'the Royal Society'},
+]
+
+TEXT = (
+    "Ada Lovelace was born in London in 1815. "
+    "Short one. "
+    "In 1843 she published notes on the engine designed by Charles Babbage. "
+    "Babbage presented his work to the Royal Society in London. "
+    "A sentence without any entity at all, long enough to be considered. "
+    + "This sentence mentions London and keeps going " + "on and on " * 30 + "until it is too long. "
+    "The Royal Society met Ada Lovelace and Charles Babbage in 1843."
+)
+
+
+@pytest.fixture(scope='module')
+def nlp():
+    """A blank English pipeline whose sentences and entities are rule-based, so no model is needed"""
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    nlp.add_pipe('entity_ruler').add_patterns(PATTERNS)
+    return nlp
+
+
+def test_candidates_match_per_sentence_reparse(nlp):
+    generator = MCQGenerator()
+    doc = nlp(TEXT)
+    entity_types = generator.extract_entities(doc)
+
+    expected = legacy_candidates(nlp, doc, entity_types, generator.min_sentence_length)
+    found = [(c.sentence, c.answer, c.type) for c in generator.find_candidate_questions(doc, entity_types)]
+
+    assert expected
+    assert found == expected
+
+
+def test_answer_offsets_point_into_the_sentence(nlp):
+    generator = MCQGenerator()
+    doc = nlp(TEXT)
+
+    for candidate in generator.find_candidate_questions(doc, generator.extract_entities(doc)):
+        assert candidate.sentence[candidate.answer_start:candidate.answer_end] == candidate.answer
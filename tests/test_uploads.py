@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import uuid
+
+import pytest
+
+from benchmarks.bench_upload_memory import write_multipart_body
+from benchmarks.common import synthetic_pdf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+UPLOAD_MB = 100
+# The upload is spooled to disk in bounded chunks, so the server should grow by far less than its size
+RSS_CEILING_MB = 40
+
+# Runs in a fresh interpreter so that its peak RSS only covers the upload
+SERVER = '''
+import json, os, sys
+from flask import Flask, jsonify, request
+from benchmarks.bench_upload_memory import peak_rss_mb
+from uploads import SpoolingRequest
+
+app = Flask(__name__)
+app.request_class = SpoolingRequest
+app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024
+
+@app.route('/upload', methods=['POST'])
+def upload():
+    upload = request.files['file'].stream
+    return jsonify(path=upload.detach(), sha256=upload.sha256, size=upload.size)
+
+body_path, boundary = sys.argv[1:]
+client = app.test_client()
+rss_before = peak_rss_mb(os.getpid())
+with open(body_path, 'rb') as body:
+    response = client.post('/upload', input_stream=body, content_length=os.path.getsize(body_path),
+                           content_type=f"multipart/form-data; boundary={boundary}")
+print(json.dumps({**response.get_json(), 'rss_before': rss_before, 'rss_after': peak_rss_mb(os.getpid())}))
+'''
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/status'), reason='peak RSS is read from /proc')
+def test_large_upload_is_spooled_to_disk(tmp_path):
+    pdf = synthetic_pdf(2, padding=UPLOAD_MB * 1024 * 1024)
+    expected_sha256 = hashlib.sha256(pdf).hexdigest()
+    boundary = uuid.uuid4().hex
+    body_path = tmp_path / 'upload.body'
+    write_multipart_body(str(body_path), pdf, boundary)
+    del pdf
+
+    output = subprocess.run([sys.executable, '-c', SERVER, str(body_path), boundary], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.splitlines()[-1])
+    try:
+        assert result['sha256'] == expected_sha256
+        assert result['size'] >= UPLOAD_MB * 1024 * 1024
+        with open(result['path'], 'rb') as f:
+            assert hashlib.sha256(f.read()).hexdigest() == expected_sha256
+        assert result['rss_after'] - result['rss_before'] < RSS_CEILING_MB
+    finally:
+        os.remove(result['path'])
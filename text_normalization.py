@@ -0,0 +1,50 @@
+import re
+from typing import Optional
+
+# Page breaks and blank lines, where chunks may be split
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n|\f')
+
+# Characters kept in the text handed to spaCy; everything else is dropped
+DISALLOWED_CHAR = re.compile(r'[^\w\s\.\,\!\?\;\:\-\$\[\]\"\'\/]')
+
+# Entities containing any other character make poor answers
+ENTITY_DISALLOWED_CHAR = re.compile(r'[^\w\s\-\.\,\']')
+
+BLANK = "______"
+
+
+# ASCII characters that DISALLOWED_CHAR drops, as a str.translate deletion table.
+# CPython translates ASCII text with an ASCII table an order of magnitude faster
+# than re.sub; text with other characters goes through the regex instead.
+_ASCII_DROP_TABLE = {codepoint: None for codepoint in range(128) if DISALLOWED_CHAR.match(chr(codepoint))}
+
+
+def drop_disallowed(text: str) -> str:
+    """Delete the characters the generator cannot use"""
+    if text.isascii():
+        return text.translate(_ASCII_DROP_TABLE)
+    return DISALLOWED_CHAR.sub('', text)
+
+
+def clean_text(text: str) -> str:
+    """Collapse whitespace and drop characters the generator cannot use"""
+    # str.split() splits on the same whitespace as \s and drops empty ends
+    return ' '.join(drop_disallowed(text).split())
+
+
+def is_clean_entity(text: str) -> bool:
+    """Whether an entity is short and plain enough to be used as an answer"""
+    return len(text) <= 50 and not ENTITY_DISALLOWED_CHAR.search(text)
+
+
+def blank_out(sentence: str, answer: str, answer_start: Optional[int] = None,
+              answer_end: Optional[int] = None) -> str:
+    """Replace the answer in the sentence with a blank
+
+    Uses the answer's character span within the sentence when it is known and
+    still matches; otherwise blanks the first case-insensitive occurrence.
+    Returns the sentence unchanged when the answer is not found.
+    """
+    if answer_start is not None and answer_end is not None and sentence[answer_start:answer_end] == answer:
+        return sentence[:answer_start] + BLANK + sentence[answer_end:]
+    return re.sub(re.escape(answer), BLANK, sentence, count=1, flags=re.IGNORECASE)
@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import os
+import tempfile
+from typing import IO, Optional
+
+from flask import Request
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.environ.get('MCQ_UPLOAD_DIR') or None
+
+
+class SpooledUpload:
+    """Writable temp file that hashes uploaded bytes as the form parser streams them in
+
+    Werkzeug's multipart parser writes each file part in bounded chunks, so an
+    upload never has to be held in memory: the bytes go straight to disk and the
+    SHA-256 (used as the result cache key) is ready once the request is parsed.
+    The file is deleted on close unless detach() handed it to someone else.
+    """
+
+    def __init__(self, directory: Optional[str] = UPLOAD_DIR):
+        self._file = tempfile.NamedTemporaryFile(prefix='mcq-upload-', suffix='.pdf', dir=directory, delete=False)
+        self.path = self._file.name
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self._detached = False
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def write(self, data: bytes) -> int:
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._file.readline(size)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def seekable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def detach(self) -> str:
+        """Keep the file after close (e.g. for a background job) and return its path"""
+        self._file.flush()
+        self._detached = True
+        return self.path
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+        if not self._detached:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> 'SpooledUpload':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SpoolingRequest(Request):
+    """Flask request that streams every uploaded file to a hashing temp file on disk"""
+
+    def _get_file_stream(self, total_content_length: Optional[int], content_type: Optional[str],
+                         filename: Optional[str] = None, content_length: Optional[int] = None) -> IO[bytes]:
+        return SpooledUpload()